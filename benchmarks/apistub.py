@@ -0,0 +1,265 @@
+# apistub.py — local stand-in for the Telegram Bot API, for load tests
+#
+#   python -m benchmarks.apistub [port] [latency] [flood]
+#
+# Serves /bot<token>/<method> over plain HTTP (point the bot's base_url at
+# http://127.0.0.1:<port>/bot). Covers the methods the bot uses: sendMessage,
+# sendAnimation, editMessageText, editMessageReplyMarkup, answerCallbackQuery,
+# getUpdates, plus getMe and the webhook calls made at startup.
+#
+# Each call waits a sampled latency, and sends are held to Telegram's limits:
+# past the per-chat or global budget the stub answers 429 with retry_after,
+# the way the real API does. Latency specs:
+#   fixed:0.05    uniform:0.02:0.2    exp:0.05    lognormal:<median>:<sigma>
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from urllib.parse import parse_qsl
+from engine.ratelimit import TokenBucket, Throttle, GLOBAL_RATE, PER_CHAT_RATE, PER_CHAT_BURST
+from engine import callbackdata
+
+SEND_METHODS = {"sendMessage", "sendAnimation", "sendPhoto", "editMessageText", "editMessageReplyMarkup"}
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Aether", "username": "aether_stub_bot"}
+
+
+def parse_latency(spec):
+    kind, *args = spec.split(":")
+    args = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda: args[0]
+    if kind == "uniform":
+        return lambda: random.uniform(args[0], args[1])
+    if kind == "exp":
+        return lambda: random.expovariate(1 / args[0])
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(math.log(args[0]), args[1])
+    raise ValueError(f"Unknown latency spec '{spec}'")
+
+
+class ApiStub:
+    # `flood`: 1.0 enforces Telegram's limits as-is; lower values tighten them
+    def __init__(self, latency="lognormal:0.06:0.5", flood=1.0):
+        self.latency = parse_latency(latency) if isinstance(latency, str) else latency
+        self.flood = flood
+        self.global_bucket = TokenBucket(GLOBAL_RATE * flood)
+        self.chats = Throttle(PER_CHAT_RATE * flood, PER_CHAT_BURST)
+
+        self.calls = Counter()          # method -> calls
+        self.calls_by_chat = Counter()  # chat_id -> accepted sends
+        self.flood_errors = 0
+        self.prompts = {}               # chat_id -> {button action: [callback_data, ...]}
+
+        self._ids = itertools.count(1)
+        self._updates = []              # queued updates not yet confirmed by an offset
+        self._update_ids = itertools.count(1)
+        self._new_update = asyncio.Event()
+        self._server = None
+
+    # -- Server --
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                path, headers, body = request
+                status, payload = await self._dispatch(path, headers, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, path, headers, body):
+        method = path.rstrip("/").rsplit("/", 1)[-1]
+        params = _parse_params(headers.get("content-type", ""), body)
+        self.calls[method] += 1
+
+        if method == "getUpdates":
+            return 200, {"ok": True, "result": await self._get_updates(params)}
+
+        await asyncio.sleep(max(self.latency(), 0))
+
+        if method in SEND_METHODS:
+            chat_id = _as_int(params.get("chat_id"))
+            wait = self._throttle(chat_id)
+            if wait:
+                self.flood_errors += 1
+                return 429, {
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {wait}",
+                    "parameters": {"retry_after": wait},
+                }
+            self.calls_by_chat[chat_id] += 1
+            markup = params.get("reply_markup")
+            if markup:
+                self._keep_prompt(chat_id, markup)
+            return 200, {"ok": True, "result": self._message(chat_id, params)}
+
+        if method == "getMe":
+            return 200, {"ok": True, "result": BOT_USER}
+        return 200, {"ok": True, "result": True}
+
+    # Seconds the caller must wait, or 0 when the send is allowed now
+    def _throttle(self, chat_id):
+        bucket = self.chats.bucket(chat_id)
+        if not bucket.try_take():
+            return math.ceil(bucket.wait_time())
+        if not self.global_bucket.try_take():
+            return math.ceil(self.global_bucket.wait_time())
+        return 0
+
+    def _message(self, chat_id, params):
+        message_id = _as_int(params.get("message_id")) or next(self._ids)
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id and chat_id > 0 else "group"},
+            "from": BOT_USER,
+        }
+        if params.get("text") is not None:
+            message["text"] = params["text"]
+        return message
+
+    def _keep_prompt(self, chat_id, markup):
+        if isinstance(markup, str):
+            markup = json.loads(markup)
+        options = {}
+        for row in markup.get("inline_keyboard", ()):
+            for button in row:
+                decoded = callbackdata.decode(button.get("callback_data"))
+                if decoded:
+                    options.setdefault(decoded[0], []).append(button["callback_data"])
+        self.prompts.setdefault(chat_id, {}).update(options)
+
+    def take_prompt(self, chat_id, action):
+        return self.prompts.get(chat_id, {}).pop(action, None)
+
+    def calls_for(self, chat_ids):
+        return sum(self.calls_by_chat[cid] for cid in chat_ids)
+
+    def forget(self, chat_ids):
+        for cid in chat_ids:
+            self.calls_by_chat.pop(cid, None)
+            self.prompts.pop(cid, None)
+
+    # -- Updates --
+    # Queues an update for the bot's getUpdates poll; returns its update_id
+    def inject(self, update):
+        update = dict(update, update_id=next(self._update_ids))
+        self._updates.append(update)
+        self._new_update.set()
+        return update["update_id"]
+
+    def callback_query(self, user_id, data):
+        now = int(time.time())
+        user = {"id": user_id, "is_bot": False, "first_name": f"Player {user_id}", "username": f"p{user_id}"}
+        return self.inject({"callback_query": {
+            "id": str(next(self._ids)),
+            "from": user,
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {"message_id": 0, "date": now, "chat": {"id": user_id, "type": "private"}, "from": BOT_USER},
+        }})
+
+    async def _get_updates(self, params):
+        offset = _as_int(params.get("offset")) or 0
+        limit = _as_int(params.get("limit")) or 100
+        timeout = float(params.get("timeout") or 0)
+
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+
+# -- HTTP plumbing --
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    _, path, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return path, headers, body
+
+
+def _parse_params(content_type, body):
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    if content_type.startswith("multipart/form-data"):
+        return _parse_multipart(content_type, body)
+    return dict(parse_qsl(body.decode()))
+
+
+def _parse_multipart(content_type, body):
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+    params = {}
+    for part in body.split(b"--" + boundary):
+        head, _, value = part.partition(b"\r\n\r\n")
+        marker = b'name="'
+        if marker not in head:
+            continue
+        name = head.split(marker, 1)[1].split(b'"', 1)[0].decode()
+        if b"filename=" not in head:
+            params[name] = value.rstrip(b"\r\n").decode(errors="replace")
+    return params
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def serve_forever(port, latency, flood):
+    stub = ApiStub(latency, flood)
+    port = await stub.start(port=port)
+    print(f"[INFO] Bot API stand-in on http://127.0.0.1:{port}/bot")
+    await asyncio.Event().wait()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
+    latency = sys.argv[2] if len(sys.argv) > 2 else "lognormal:0.06:0.5"
+    flood = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    asyncio.run(serve_forever(port, latency, flood))
+
+
+if __name__ == "__main__":
+    main()
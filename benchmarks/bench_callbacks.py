@@ -0,0 +1,78 @@
+# bench_callbacks.py — callback dispatch cost per button type
+#
+#   python -m benchmarks.bench_callbacks
+#
+# "chain" is the old handle_callback front end: an if/elif ladder of
+# startswith checks with split("_") parsing. "router" is callbackdata.decode
+# plus the ROUTES dict lookup. Only dispatch and parsing are timed, not the
+# handlers themselves.
+
+import timeit
+from engine import callbackdata
+
+USER = 7391045821
+SAMPLES = {
+    "join": (("join",), "join"),
+    "vote": (("vote", USER), f"vote_{USER}"),
+    "task_complete": (("task_complete", "say_stars"), "task_complete_say_stars"),
+    "task_abandon": (("task_abandon",), "task_abandon_0"),
+    "check_win": (("check_win",), "check_win"),
+    "usepower": (("usepower", USER), f"usepower_{USER}"),
+    "useitem": (("useitem", "relic_shard"), "useitem_relic_shard"),
+    "echo_vote": (("echo_vote", "escape_the_core"), "echo_vote_escape_the_core"),
+    "page": (("page", "v", 2), "page_v_2"),
+    "whisper": (("whisper", USER), f"whisper_{USER}"),
+}
+
+ROUTES = {action: action for action in callbackdata.ACTIONS}
+
+
+def chain(data):
+    if data == "join":
+        return "join", ()
+    elif data.startswith("vote_"):
+        return "vote", (int(data.split("_")[1]),)
+    elif data.startswith("task_complete_"):
+        return "task_complete", (data.split("_")[-1],)
+    elif data.startswith("task_abandon_"):
+        return "task_abandon", ()
+    elif data == "check_win":
+        return "check_win", ()
+    elif data.startswith("usepower_"):
+        return "usepower", (int(data.split("_")[1]),)
+    elif data.startswith("useitem_"):
+        return "useitem", (data.split("_", 1)[1],)
+    elif data.startswith("echo_vote_"):
+        return "echo_vote", (data.split("_")[-1],)
+    elif data.startswith("page_"):
+        _, code, page = data.split("_")
+        return "page", (code, int(page))
+    elif data.startswith("whisper_"):
+        return "whisper", (int(data.split("_")[1]),)
+
+
+def router(data):
+    decoded = callbackdata.decode(data)
+    return ROUTES.get(decoded[0]) if decoded else None, decoded
+
+
+def per_call(fn, data, number=200_000):
+    return min(timeit.repeat(lambda: fn(data), number=number, repeat=5)) / number
+
+
+def main():
+    print(f"{'button':>14} {'old bytes':>9} {'new bytes':>9} {'chain ns':>9} {'router ns':>9} {'legacy ns':>9}")
+    for name, (args, legacy) in SAMPLES.items():
+        encoded = callbackdata.encode(*args)
+        assert callbackdata.decode(encoded)[0] == name
+        print(
+            f"{name:>14} {len(legacy):>9} {len(encoded):>9}"
+            f" {per_call(chain, legacy) * 1e9:>9.0f}"
+            f" {per_call(router, encoded) * 1e9:>9.0f}"
+            f" {per_call(router, legacy) * 1e9:>9.0f}"
+        )
+    print("legacy: old-style payloads still on screen, decoded by the router's fallback")
+
+
+if __name__ == "__main__":
+    main()
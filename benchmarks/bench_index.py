@@ -0,0 +1,77 @@
+# bench_index.py — reverse-lookup cost vs. number of concurrent games
+#
+#   python -m benchmarks.bench_index
+#
+# Compares storage.index lookups with the nested-dict scans they replace.
+# Lookup cost through the index should stay flat as the game count grows.
+
+import random
+import timeit
+from storage import index
+
+PLAYERS_PER_GAME = 12
+LOOKUPS = 20000
+
+
+def scan_chat_id_by_user(games, user_id):
+    for chat_id, game in games.items():
+        if user_id in game["players"]:
+            return chat_id
+    return None
+
+
+def scan_user_id_by_name(games, username):
+    for game in games.values():
+        for pid, player in game["players"].items():
+            if player.get("username") == username:
+                return pid
+    return None
+
+
+def build(n_games):
+    games = {}
+    for chat_id in range(-1, -n_games - 1, -1):
+        players = {}
+        for seat in range(PLAYERS_PER_GAME):
+            user_id = abs(chat_id) * 100 + seat
+            username = f"user{user_id}"
+            players[user_id] = {"username": username}
+            index.remember(chat_id, user_id, username)
+        games[chat_id] = {"players": players}
+    return games
+
+
+def run(n_games):
+    games = build(n_games)
+    users = [(chat_id, uid, p["username"]) for chat_id, g in games.items() for uid, p in g["players"].items()]
+    sample = [random.choice(users) for _ in range(LOOKUPS)]
+
+    def indexed():
+        for chat_id, uid, name in sample:
+            index.get_chat_id_by_user(uid)
+            index.get_user_id_by_name(name, chat_id)
+            index.get_username(uid)
+
+    def scanned():
+        for chat_id, uid, name in sample[:200]:
+            scan_chat_id_by_user(games, uid)
+            scan_user_id_by_name(games, name)
+
+    t_index = min(timeit.repeat(indexed, number=1, repeat=3)) / (LOOKUPS * 3)
+    t_scan = min(timeit.repeat(scanned, number=1, repeat=3)) / (200 * 2)
+
+    for chat_id in games:
+        for uid in list(games[chat_id]["players"]):
+            index.forget(chat_id, uid)
+    return t_index, t_scan
+
+
+def main():
+    print(f"{'games':>8} {'index ns/lookup':>16} {'scan ns/lookup':>16}")
+    for n_games in (10, 100, 1000, 10000):
+        t_index, t_scan = run(n_games)
+        print(f"{n_games:>8} {t_index * 1e9:>16.0f} {t_scan * 1e9:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
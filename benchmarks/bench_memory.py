@@ -0,0 +1,61 @@
+# bench_memory.py — bytes per player: nested dicts vs. slotted records
+#
+#   python -m benchmarks.bench_memory
+
+import random
+import tracemalloc
+from storage.records import GameState, PlayerState, ROLE_IDS
+
+GAMES = 2000
+PLAYERS_PER_GAME = 12
+ROLES = list(ROLE_IDS)
+FACTIONS = ["Luminae", "Veilborn", "Nexus", "Rogue", "Neutral", "Goat"]
+
+
+def player_fields(user_id):
+    # Names are built per player, as they arrive from Telegram updates
+    return {
+        "name": f"Player {user_id}",
+        "username": f"user{user_id}",
+        "role": random.choice(ROLES),
+        "faction": random.choice(FACTIONS),
+        "alive": True,
+    }
+
+
+def build_dicts():
+    return {
+        -chat: {"players": {chat * 100 + seat: player_fields(chat * 100 + seat) for seat in range(PLAYERS_PER_GAME)},
+                "phase": "night", "round": 1, "started": True, "votes": {}, "deaths": []}
+        for chat in range(1, GAMES + 1)
+    }
+
+
+def build_records():
+    games = {}
+    for chat in range(1, GAMES + 1):
+        game = GameState()
+        game.players = {chat * 100 + seat: PlayerState(**player_fields(chat * 100 + seat)) for seat in range(PLAYERS_PER_GAME)}
+        game.phase, game.round, game.started = "night", 1, True
+        games[-chat] = game
+    return games
+
+
+def measure(builder):
+    tracemalloc.start()
+    games = builder()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del games
+    return size / (GAMES * PLAYERS_PER_GAME)
+
+
+def main():
+    before = measure(build_dicts)
+    after = measure(build_records)
+    print(f"nested dicts:   {before:8.0f} bytes/player")
+    print(f"slotted records:{after:8.0f} bytes/player  ({(1 - after / before) * 100:.0f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench_persist.py — multi-game write throughput: memory only vs. SQLite write-behind
+#
+#   python -m benchmarks.bench_persist [games] [rounds]
+#
+# Each simulated round mutates every game (votes and phase flips) the way the
+# handlers do, marks it dirty, and checkpoints at the two phase boundaries.
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from storage import database as db
+from storage import persist
+
+PLAYERS_PER_GAME = 10
+
+
+def seed_games(n_games):
+    db.games.clear()
+    for chat in range(1, n_games + 1):
+        db.games[-chat] = {
+            "players": {chat * 100 + seat: {"username": f"user{chat * 100 + seat}", "role": "Goat", "alive": True}
+                        for seat in range(PLAYERS_PER_GAME)},
+            "phase": "night",
+            "round": 0,
+            "votes": {},
+        }
+
+
+def play_round(chat_id):
+    game = db.games[chat_id]
+    players = list(game["players"])
+    game["phase"] = "day"
+    persist.checkpoint(chat_id)
+    for voter in players:
+        game["votes"][voter] = random.choice(players)   # cast_vote
+        persist.mark_dirty(chat_id)
+    game["round"] += 1
+    game["phase"] = "night"
+    game["votes"] = {}
+    persist.checkpoint(chat_id)
+
+
+async def run(n_games, rounds):
+    seed_games(n_games)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for chat_id in list(db.games):
+            play_round(chat_id)
+        await asyncio.sleep(0)  # let queued checkpoint flushes run, as the bot's loop would
+    await persist.flush_async()
+    elapsed = time.perf_counter() - started
+    return n_games * rounds / elapsed
+
+
+def main():
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    memory = asyncio.run(run(n_games, rounds))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persist.open_store(os.path.join(tmp, "bench.db"))
+        sqlite = asyncio.run(run(n_games, rounds))
+        flushes, rows = persist.stats["flushes"], persist.stats["rows_written"]
+        persist.close_store()
+
+    print(f"{n_games} games x {rounds} rounds, {PLAYERS_PER_GAME} players each")
+    print(f"memory:  {memory:10.0f} game-rounds/sec")
+    print(f"sqlite:  {sqlite:10.0f} game-rounds/sec  ({flushes} transactions, {rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
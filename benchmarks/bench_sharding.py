@@ -0,0 +1,186 @@
+# bench_sharding.py — games/sec through the sharded front -> worker path
+#
+#   python -m benchmarks.bench_sharding [games] [players] [max_workers]
+#
+# The front builds each game's raw updates (the host's /startgame, a Join press
+# and a line of chatter per player in the group, then a DM from each player),
+# routes them with engine.sharding.Router and puts the plain dicts on the
+# per-worker multiprocessing queues, as sharding.run's forward() does. Each
+# worker reads its inbox from an executor thread like sharding._serve, seats the
+# players through the real callback handler and, once every seated player's DM
+# has arrived, plays the game out with benchmarks/simulate.py. A DM that lands
+# on a worker not hosting the sender's game is counted as misrouted; that game
+# never starts. Reports games/sec for N = 1, 2, 4 ... max_workers, then the
+# front's Router.route cost per update.
+
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+import timeit
+from types import SimpleNamespace
+from storage import database as db
+from storage import index
+from engine import outbox, callbackdata
+from engine.sharding import Router
+from handlers.callbacks import handle_callback
+from benchmarks import simulate
+from benchmarks.fakebot import FakeBot, callback_update
+
+JOIN = callbackdata.encode("join")
+
+SAMPLE_UPDATES = {
+    "group message": {"update_id": 1, "message": {"message_id": 5, "chat": {"id": -1001234567890, "type": "supergroup"},
+                                                   "from": {"id": 7391045821}, "text": "The stars remember me."}},
+    "group join": {"update_id": 2, "callback_query": {"id": "9", "from": {"id": 7391045821}, "data": JOIN,
+                                                       "message": {"message_id": 6, "chat": {"id": -1001234567890, "type": "supergroup"}}}},
+    "dm button": {"update_id": 3, "callback_query": {"id": "10", "from": {"id": 7391045821}, "data": "1p3e2k1t9",
+                                                      "message": {"message_id": 7, "chat": {"id": 7391045821, "type": "private"}}}},
+    "dm command": {"update_id": 4, "message": {"message_id": 8, "chat": {"id": 7391045821, "type": "private"},
+                                                "from": {"id": 7391045821}, "text": "/mytask"}},
+}
+
+
+# -- Front --
+def game_updates(chat_id, n_players):
+    group = {"id": chat_id, "type": "supergroup"}
+    players = simulate.seats(chat_id, n_players)
+    yield {"message": {"message_id": 1, "chat": group, "from": {"id": players[0]}, "text": "/startgame"}}
+    for user_id in players:
+        yield {"callback_query": {"id": str(user_id), "from": {"id": user_id}, "data": JOIN,
+                                  "message": {"message_id": 2, "chat": group}}}
+        yield {"message": {"message_id": 3, "chat": group, "from": {"id": user_id}, "text": "The stars remember me."}}
+    for user_id in players:
+        yield {"message": {"message_id": 4, "chat": {"id": user_id, "type": "private"}, "from": {"id": user_id},
+                           "text": "/ready"}}
+
+
+def scale(n_games, n_players, workers):
+    ctx = multiprocessing.get_context("spawn")
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker_main, args=(shard, inboxes[shard], results, n_players), daemon=True)
+                 for shard in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:  # imports done, before timing
+        results.get()
+
+    router = Router(workers)
+    started = time.perf_counter()
+    for game_no in range(n_games):
+        for data in game_updates(-(game_no + 1), n_players):
+            inboxes[router.route(data)].put(data)
+    for inbox in inboxes:
+        inbox.put(None)
+    finished = misrouted = 0
+    for _ in processes:
+        games, strays = results.get()
+        finished += games
+        misrouted += strays
+    elapsed = time.perf_counter() - started
+
+    for process in processes:
+        process.join(timeout=10)
+    return finished, misrouted, elapsed
+
+
+def route_cost():
+    router = Router(8)
+    router.route(SAMPLE_UPDATES["group join"])  # learn the player's group
+    return {name: min(timeit.repeat(lambda: router.route(data), number=100_000, repeat=3)) / 100_000
+            for name, data in SAMPLE_UPDATES.items()}
+
+
+# -- Worker --
+def _worker_main(shard, inbox, results, n_players):
+    asyncio.run(_worker(shard, inbox, results, n_players))
+
+
+async def _worker(shard, inbox, results, n_players):
+    random.seed(shard)  # role deals, stories and plot twists use the global RNG
+    policy = simulate.random_policy(random.Random(shard))
+    outbox.limiter = simulate.NoLimit()
+    bot = FakeBot()
+    context = SimpleNamespace(bot=bot, job_queue=None, application=None, bot_data={}, chat_data={}, user_data={})
+
+    async def press(user_id, data):
+        await handle_callback(callback_update(bot, user_id, data, username=f"p{user_id}"), context)
+
+    seated = {}   # chat -> players joined, in seat order
+    waiting = {}  # chat -> players whose DM has not arrived yet
+    games = []
+    misrouted = 0
+    loop = asyncio.get_running_loop()
+    results.put(None)
+    while True:
+        data = await loop.run_in_executor(None, inbox.get)
+        if data is None:
+            break
+        query = data.get("callback_query")
+        if query is not None:
+            chat_id, user_id = query["message"]["chat"]["id"], query["from"]["id"]
+            await handle_callback(callback_update(bot, user_id, query["data"], chat_id=chat_id, username=f"p{user_id}"),
+                                  context)
+            seated[chat_id].append(user_id)
+            waiting[chat_id].add(user_id)
+            continue
+
+        message = data["message"]
+        chat_id, user_id = message["chat"]["id"], message["from"]["id"]
+        if message["chat"]["type"] != "private":
+            if message["text"] == "/startgame":
+                db.start_new_game(chat_id)
+                seated[chat_id], waiting[chat_id] = [], set()
+            continue
+
+        game_chat = index.get_chat_id_by_user(user_id)
+        if game_chat not in waiting:
+            misrouted += 1
+            continue
+        waiting[game_chat].discard(user_id)
+        if not waiting[game_chat] and len(seated[game_chat]) == n_players:
+            del waiting[game_chat]
+            games.append(loop.create_task(
+                simulate.play_game(bot, press, context, game_chat, n_players, policy, seated=seated.pop(game_chat))))
+
+    finished = 0
+    for outcome in await asyncio.gather(*games, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            print(f"[WARN] Sharded game on worker {shard} crashed: {outcome!r}")
+        else:
+            finished += 1
+    results.put((finished, misrouted))
+
+
+def main():
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_players = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+
+    print(f"{n_games} games x {n_players} players, front -> worker queues")
+    print(f"{'workers':>8} {'games/sec':>10} {'speedup':>8} {'efficiency':>11} {'finished':>9} {'misrouted':>10}")
+    base = None
+    for workers in counts:
+        finished, misrouted, elapsed = scale(n_games, n_players, workers)
+        rate = finished / elapsed
+        base = base or rate
+        print(f"{workers:>8} {rate:>10.1f} {rate / base:>7.2f}x {rate / base / workers:>10.0%} "
+              f"{finished:>9} {misrouted:>10}")
+
+    print(f"{'front routing':>16} {'us/update':>10}")
+    for name, seconds in route_cost().items():
+        print(f"{name:>16} {seconds * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# fakebot.py — in-process stand-in for telegram.Bot and callback updates
+#
+# Every Bot API method is accepted and counted; nothing leaves the process.
+# Inline keyboards sent to a player are kept as that player's open prompts so
+# a simulated player can "press" one of their buttons.
+
+import asyncio
+import itertools
+from collections import Counter
+from types import SimpleNamespace
+from telegram.error import Forbidden
+from engine import callbackdata
+
+
+class FakeMessage:
+    __slots__ = ("message_id", "chat_id", "chat", "text", "reply_markup")
+
+    def __init__(self, message_id, chat_id, text=None, reply_markup=None):
+        self.message_id = message_id
+        self.chat_id = chat_id
+        self.chat = SimpleNamespace(id=chat_id)
+        self.text = text
+        self.reply_markup = reply_markup
+
+
+class FakeBot:
+    # `latency`: seconds each call takes, to mimic the round trip to Telegram.
+    # `blocked`: chat ids that raise Forbidden, like users who blocked the bot.
+    def __init__(self, latency=0.0, blocked=()):
+        self.latency = latency
+        self.blocked = set(blocked)
+        self.calls = Counter()          # method -> calls
+        self.calls_by_chat = Counter()  # chat_id -> calls
+        self.prompts = {}               # chat_id -> {button action: [callback_data, ...]}
+        self._ids = itertools.count(1)
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        async def call(**kwargs):
+            return await self._call(method, **kwargs)
+        return call
+
+    async def _call(self, method, chat_id=None, text=None, reply_markup=None, message_id=None, **kwargs):
+        self.calls[method] += 1
+        self.calls_by_chat[chat_id] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+
+        if reply_markup is not None and hasattr(reply_markup, "inline_keyboard"):
+            self._keep_prompt(chat_id, reply_markup)
+        return FakeMessage(message_id or next(self._ids), chat_id, text, reply_markup)
+
+    def _keep_prompt(self, chat_id, markup):
+        options = {}
+        for row in markup.inline_keyboard:
+            for button in row:
+                decoded = callbackdata.decode(button.callback_data)
+                if decoded:
+                    options.setdefault(decoded[0], []).append(button.callback_data)
+        self.prompts.setdefault(chat_id, {}).update(options)
+
+    def take_prompt(self, chat_id, action):
+        return self.prompts.get(chat_id, {}).pop(action, None)
+
+    def calls_for(self, chat_ids):
+        return sum(self.calls_by_chat[cid] for cid in chat_ids)
+
+    def forget(self, chat_ids):
+        for cid in chat_ids:
+            self.calls_by_chat.pop(cid, None)
+            self.prompts.pop(cid, None)
+
+
+class FakeQuery:
+    def __init__(self, bot, user_id, chat_id, data, username=None):
+        self.bot = bot
+        self.id = data
+        self.data = data
+        self.from_user = SimpleNamespace(id=user_id, username=username, full_name=username or f"user{user_id}")
+        self.message = FakeMessage(0, chat_id)
+
+    async def answer(self, text=None, **kwargs):
+        await self.bot.answer_callback_query(callback_query_id=self.data, text=text)
+
+    async def edit_message_text(self, text, **kwargs):
+        await self.bot.edit_message_text(chat_id=self.message.chat_id, message_id=0, text=text, **kwargs)
+
+    async def edit_message_reply_markup(self, reply_markup=None, **kwargs):
+        await self.bot.edit_message_reply_markup(chat_id=self.message.chat_id, message_id=0, reply_markup=reply_markup)
+
+
+# A button press in a private chat, shaped like the Update handle_callback receives
+def callback_update(bot, user_id, data, chat_id=None, username=None):
+    chat_id = user_id if chat_id is None else chat_id
+    query = FakeQuery(bot, user_id, chat_id, data, username)
+    return SimpleNamespace(
+        callback_query=query,
+        effective_user=query.from_user,
+        effective_chat=SimpleNamespace(id=chat_id, type="private" if chat_id == user_id else "group"),
+        message=None,
+    )
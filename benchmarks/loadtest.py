@@ -0,0 +1,133 @@
+# loadtest.py — N concurrent games against the local Bot API stand-in
+#
+#   python -m benchmarks.loadtest [games] [players] [latency] [flood] [concurrent_updates]
+#
+# Runs a real python-telegram-bot Application against benchmarks/apistub.py:
+# updates arrive through getUpdates long polling, handlers run as in
+# production, and every reply crosses HTTP with sampled latency, per-chat
+# limits and 429 retry_after. Simulated players press the buttons the stub
+# saw being sent (same game loop as benchmarks/simulate.py).
+# Reports handler throughput and update latency: injected -> handler done.
+
+import asyncio
+import random
+import sys
+import time
+from telegram.ext import ApplicationBuilder, CallbackQueryHandler
+from handlers.callbacks import handle_callback
+from engine import outbox
+from benchmarks.apistub import ApiStub
+from benchmarks.simulate import play_game, random_policy, instrument, restore, _summary
+
+TOKEN = "123456:LOADTEST"
+
+
+class Driver:
+    def __init__(self, stub):
+        self.stub = stub
+        self.waiting = {}    # update_id -> (future, injected at)
+        self.latencies = []
+
+    # Feeds a press to the bot through getUpdates and waits until its handler has run
+    async def press(self, user_id, data):
+        update_id = self.stub.callback_query(user_id, data)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[update_id] = (future, time.perf_counter())
+        await future
+
+    async def handle(self, update, context):
+        try:
+            await handle_callback(update, context)
+        finally:
+            entry = self.waiting.pop(update.update_id, None)
+            if entry is not None:
+                future, injected = entry
+                self.latencies.append(time.perf_counter() - injected)
+                if not future.done():
+                    future.set_result(None)
+
+
+async def run(n_games, n_players=8, latency="lognormal:0.06:0.5", flood=1.0, concurrent_updates=256, seed=0):
+    random.seed(seed)
+    policy = random_policy(random.Random(seed))
+    stub = ApiStub(latency, flood)
+    port = await stub.start()
+    driver = Driver(stub)
+
+    application = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .base_url(f"http://127.0.0.1:{port}/bot")
+        .concurrent_updates(concurrent_updates)
+        .connection_pool_size(64)
+        .get_updates_connection_pool_size(2)
+        .build()
+    )
+    application.add_handler(CallbackQueryHandler(driver.handle))
+
+    phase_latencies = {}
+    originals = instrument(phase_latencies)
+    games = []
+    try:
+        await application.initialize()
+        await application.start()
+        await application.updater.start_polling(poll_interval=0, timeout=1)
+        context = application.context_types.context(application)
+
+        async def one(game_no):
+            try:
+                games.append(await play_game(stub, driver.press, context, -(game_no + 1), n_players, policy))
+            except Exception as e:
+                print(f"[WARN] Load game {game_no} crashed: {e!r}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(n_games)))
+        elapsed = time.perf_counter() - started
+    finally:
+        restore(originals)
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+        await stub.close()
+
+    handled = len(driver.latencies)
+    return {
+        "games": len(games),
+        "elapsed": elapsed,
+        "updates": handled,
+        "updates_per_sec": handled / elapsed if elapsed else 0.0,
+        "update_latency": _summary(driver.latencies) if handled else None,
+        "phase_latency": {name: _summary(samples) for name, samples in phase_latencies.items()},
+        "api_calls": dict(stub.calls),
+        "flood_errors": stub.flood_errors,
+        "outbox": outbox.snapshot(),
+    }
+
+
+def _ms(s):
+    return f"avg {s['avg'] * 1e3:.1f}  p50 {s['p50'] * 1e3:.1f}  p95 {s['p95'] * 1e3:.1f}  max {s['max'] * 1e3:.1f} ms"
+
+
+def main():
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_players = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    latency = sys.argv[3] if len(sys.argv) > 3 else "lognormal:0.06:0.5"
+    flood = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+    concurrent_updates = int(sys.argv[5]) if len(sys.argv) > 5 else 256
+
+    report = asyncio.run(run(n_games, n_players, latency, flood, concurrent_updates))
+
+    print(f"{report['games']} games x {n_players} players in {report['elapsed']:.1f}s, latency {latency}, flood x{flood}")
+    print(f"handlers:   {report['updates_per_sec']:8.1f} updates/sec ({report['updates']} updates)")
+    if report["update_latency"]:
+        print(f"update:     {_ms(report['update_latency'])}")
+    for name, s in report["phase_latency"].items():
+        print(f"{name:<11} {_ms(s)}")
+    box = report["outbox"]
+    print(f"429s:       {report['flood_errors']} from the API, {box['retry_after']} retried by the outbox; "
+          f"queue wait avg {box['wait_avg'] * 1e3:.0f} ms, max {box['wait_max'] * 1e3:.0f} ms")
+    print("api calls:  " + ", ".join(f"{m}={n}" for m, n in sorted(report["api_calls"].items())))
+
+
+if __name__ == "__main__":
+    main()
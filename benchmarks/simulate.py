@@ -0,0 +1,257 @@
+# simulate.py — headless end-to-end games against a fake Bot
+#
+#   python -m benchmarks.simulate [games] [players] [concurrency] [seed]
+#
+# Drives begin_game -> night -> day -> tally_votes -> check_for_winner through
+# the real phase code and callback handler. Players press the buttons they
+# were sent (see benchmarks/fakebot.py); phase deadlines are fast-forwarded as
+# soon as every simulated player has answered, so a game takes milliseconds.
+# Reports games/sec, Bot API calls per game and per-phase latency.
+#
+# Pass a scripted policy to run() to replay a fixed game for regression checks.
+
+import asyncio
+import random
+import sys
+import time
+from types import SimpleNamespace
+from storage import database as db
+from storage import index
+from engine import phases, timers, outbox, callbackdata, lifecycle
+from handlers.callbacks import handle_callback
+from benchmarks.fakebot import FakeBot, callback_update
+
+MAX_ROUNDS = 12
+PHASES = ("begin_game", "start_night_phase", "start_day_phase", "tally_votes")
+
+handler_errors = {}  # button action -> presses the callback handler raised on
+
+
+# -- Player policies --
+# A policy gets (chat_id, user_id, action, options) and returns the callback_data
+# to press, or None to let the phase deadline run out for that player.
+def random_policy(rng, idle=0.1):
+    def choose(chat_id, user_id, action, options):
+        if rng.random() < idle:
+            return None
+        return rng.choice(options)
+    return choose
+
+
+# `script` maps (user_id, action) to the presses to make, in order
+def scripted_policy(script):
+    queues = {key: list(presses) for key, presses in script.items()}
+
+    def choose(chat_id, user_id, action, options):
+        presses = queues.get((user_id, action))
+        return presses.pop(0) if presses else None
+    return choose
+
+
+# -- Instrumentation --
+class NoLimit:
+    async def acquire(self, chat_id):
+        pass
+
+    def try_chat(self, chat_id):
+        return True
+
+    def chat_ready_in(self, chat_id):
+        return 0
+
+    async def acquire_global(self):
+        pass
+
+
+def instrument(latencies):
+    def timed(name, fn):
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                latencies.setdefault(name, []).append(time.perf_counter() - started)
+        return wrapper
+
+    originals = {name: getattr(phases, name) for name in PHASES}
+    for name, fn in originals.items():
+        setattr(phases, name, timed(name, fn))
+    # Deadlines call through the registry, not the module attribute
+    timers.register("begin_game", phases.begin_game)
+    timers.register("night_end", phases.start_day_phase)
+    timers.register("day_end", phases.tally_votes)
+    return originals
+
+
+def restore(originals):
+    for name, fn in originals.items():
+        setattr(phases, name, fn)
+    timers.register("begin_game", phases.begin_game)
+    timers.register("night_end", phases.start_day_phase)
+    timers.register("day_end", phases.tally_votes)
+
+
+# -- One game --
+# `api` is where sent buttons are collected (take_prompt) and calls counted
+# (calls_for); `press(user_id, data)` delivers a button press to the bot.
+async def press_all(api, press, players, action, policy, chat_id):
+    for user_id in players:
+        options = api.take_prompt(user_id, action)
+        if not options:
+            continue
+        options = [data for data in options if callbackdata.decode(data)[1] != (user_id,)]
+        choice = policy(chat_id, user_id, action, options) if options else None
+        if choice is None:
+            continue
+        try:
+            await press(user_id, choice)
+        except Exception as e:
+            # Recorded rather than fatal, so one broken button does not hide the rest of the run
+            if action not in handler_errors:
+                print(f"[WARN] Pressing {choice} failed: {e!r}")
+            handler_errors[action] = handler_errors.get(action, 0) + 1
+
+
+def seats(chat_id, n_players):
+    return [-chat_id * 1000 + seat for seat in range(n_players)]
+
+
+# Whatever deadline the players did not beat fires now
+async def fast_forward(chat_id):
+    await outbox_idle()
+    await timers.fire_now(chat_id, "phase")
+
+
+async def outbox_idle():
+    while outbox.snapshot()["depth"]:
+        await asyncio.sleep(0)
+
+
+# `seated` lists players who already joined through the handlers (see bench_sharding.py)
+async def play_game(api, press, context, chat_id, n_players, policy, seated=None):
+    players = seated or seats(chat_id, n_players)
+    if seated is None:
+        db.start_new_game(chat_id)
+        for user_id in players:
+            index.add_player(chat_id, user_id, f"Player {user_id}")
+            index.set_username(chat_id, user_id, f"p{user_id}")
+
+    await phases.begin_game(context, chat_id)
+    winner, rounds = None, 0
+    while rounds < MAX_ROUNDS:
+        rounds += 1
+        await press_all(api, press, players, "usepower", policy, chat_id)
+        if db.get_phase(chat_id) == "night":
+            await fast_forward(chat_id)
+
+        await press_all(api, press, players, "echo_vote", policy, chat_id)
+        await press_all(api, press, players, "vote", policy, chat_id)
+        if "phase" in db.games.get(chat_id, {}).get("deadlines", {}):
+            await fast_forward(chat_id)
+
+        if chat_id not in db.games:  # the tally found a winner and ended the game
+            winner = True
+            break
+        if len(db.get_alive_players(chat_id)) < 2:
+            break
+        await phases.start_night_phase(context, chat_id)
+
+    await outbox_idle()
+    calls = api.calls_for([chat_id, *players])
+    api.forget([chat_id, *players])
+    if chat_id in db.games:  # undecided after MAX_ROUNDS
+        lifecycle.end_game(chat_id, "abandoned")
+    return winner, rounds, calls
+
+
+# -- Batch --
+# Returns the report dict; `policy` defaults to seeded random players
+async def run(n_games, n_players=8, concurrency=50, seed=0, policy=None, rate_limit=False):
+    rng = random.Random(seed)
+    random.seed(seed)  # role deals, stories and plot twists use the global RNG
+    policy = policy or random_policy(rng)
+    bot = FakeBot()
+    context = SimpleNamespace(bot=bot, job_queue=None, application=None, bot_data={}, chat_data={}, user_data={})
+
+    latencies = {}
+    handler_errors.clear()
+    originals = instrument(latencies)
+    async def press(user_id, data):
+        await handle_callback(callback_update(bot, user_id, data, username=f"p{user_id}"), context)
+
+    real_limiter = outbox.limiter
+    if not rate_limit:
+        outbox.limiter = NoLimit()
+
+    games = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(game_no):
+        async with semaphore:
+            try:
+                games.append(await play_game(bot, press, context, -(game_no + 1), n_players, policy))
+            except Exception as e:
+                print(f"[WARN] Simulated game {game_no} crashed: {e!r}")
+
+    early_before = {phase: dict(totals) for phase, totals in phases.early_ends.items()}
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(n) for n in range(n_games)))
+    finally:
+        elapsed = time.perf_counter() - started
+        outbox.limiter = real_limiter
+        restore(originals)
+
+    finished = len(games)
+    return {
+        "games": finished,
+        "crashed": n_games - finished,
+        "elapsed": elapsed,
+        "games_per_sec": finished / elapsed if elapsed else 0.0,
+        "calls_per_game": sum(calls for _, _, calls in games) / finished if finished else 0.0,
+        "rounds_per_game": sum(rounds for _, rounds, _ in games) / finished if finished else 0.0,
+        "decided": sum(1 for winner, _, _ in games if winner),
+        "calls_by_method": dict(bot.calls),
+        "handler_errors": dict(handler_errors),
+        "latency": {name: _summary(samples) for name, samples in latencies.items()},
+        "outbox": outbox.snapshot(),
+        "lifecycle": dict(lifecycle.stats),
+        "early_ends": {
+            phase: {key: totals[key] - early_before[phase][key] for key in totals}
+            for phase, totals in phases.early_ends.items()
+        },
+    }
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)]
+    return {"n": len(samples), "avg": sum(samples) / len(samples), "p50": pick(0.5), "p95": pick(0.95), "max": samples[-1]}
+
+
+def main():
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_players = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    report = asyncio.run(run(n_games, n_players, concurrency, seed))
+
+    print(f"{report['games']} games x {n_players} players, {concurrency} at a time ({report['crashed']} crashed)")
+    print(f"throughput: {report['games_per_sec']:10.1f} games/sec")
+    print(f"api calls:  {report['calls_per_game']:10.1f} per game   rounds: {report['rounds_per_game']:.1f} per game   decided: {report['decided']}")
+    print(f"{'phase':>18} {'n':>6} {'avg ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name in PHASES:
+        s = report["latency"].get(name)
+        if s:
+            print(f"{name:>18} {s['n']:>6} {s['avg'] * 1e3:>8.2f} {s['p50'] * 1e3:>8.2f} {s['p95'] * 1e3:>8.2f} {s['max'] * 1e3:>8.2f}")
+    for phase, early in report["early_ends"].items():
+        print(f"early {phase:>5} ends: {early['count']:6} ({early['count'] / max(report['games'], 1):.2f} per game), "
+              f"{early['seconds_saved'] / max(report['games'], 1):.1f}s of waiting saved per game")
+    if report["handler_errors"]:
+        print("handler errors: " + ", ".join(f"{p}={n}" for p, n in sorted(report["handler_errors"].items())))
+    print("calls by method: " + ", ".join(f"{m}={n}" for m, n in sorted(report["calls_by_method"].items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# soak_lifecycle.py — RSS over thousands of simulated games
+#
+#   python -m benchmarks.soak_lifecycle [games] [batch] [players]
+#
+# Plays games in batches through benchmarks/simulate.py. Every game is torn
+# down by engine.lifecycle, either by its winning tally or after MAX_ROUNDS.
+# Prints RSS and the engine's per-game tables after each batch; with teardown
+# working, both stay flat once the allocator has warmed up.
+
+import asyncio
+import gc
+import os
+import sys
+from storage import database as db
+from storage import index
+from engine import phases, lifecycle, timers
+from benchmarks.simulate import run
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, where /proc is missing
+
+
+def live_tables():
+    return {
+        "games": len(db.games),
+        "players": len(index._chat_by_user),
+        "twists": len(phases.twist_counter),
+        "timers": len(timers.wheel),
+        "active": len(lifecycle._last_active),
+    }
+
+
+async def soak(n_games, batch, n_players):
+    print(f"{'games':>7} {'rss MB':>8} {'reclaimed MB':>13} {'objects':>10}  live tables")
+    played = 0
+    first = None
+    while played < n_games:
+        await run(batch, n_players, concurrency=batch, seed=played)
+        played += batch
+        gc.collect()
+        rss = rss_kb()
+        first = first or rss
+        stats = lifecycle.stats
+        print(f"{played:>7} {rss / 1024:>8.1f} {stats['bytes_reclaimed'] / 2**20:>13.1f} {stats['objects_reclaimed']:>10}  {live_tables()}")
+    return first, rss_kb()
+
+
+def main():
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    n_players = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    first, last = asyncio.run(soak(n_games, batch, n_players))
+    print(f"RSS after first batch {first / 1024:.1f} MB, after {n_games} games {last / 1024:.1f} MB "
+          f"({(last - first) / 1024:+.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
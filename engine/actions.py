@@ -0,0 +1,59 @@
+# actions.py — night actions queued per game and resolved together at dawn
+#
+# During the night a power use is a single dict write; the power itself runs
+# in resolve(), in a fixed order so the outcome no longer depends on who
+# clicked first. A player's later choice replaces their earlier one.
+# Each role's priority comes from engine/roles.json; lower runs first:
+# protections, then swaps, then other effects, then kills, then reveals.
+#
+# The queue lives in the game state next to its deadlines, so storage.persist
+# saves it and a restart mid-night still resolves every submitted power.
+# Entries name the role whose power was used; resolve() binds it at dawn.
+
+from storage import database as db
+from storage import persist
+from engine import lifecycle
+
+KEY = "night_actions"  # db.games[chat_id][KEY] -> {user_id: [priority, role_id, target_id, target_username]}
+
+
+def queue(chat_id, user_id, priority, role_id, target_id, target_username):
+    game = db.games.get(chat_id)
+    if game is None:
+        return
+    game.setdefault(KEY, {})[user_id] = [priority, int(role_id), target_id, target_username]
+    persist.mark_dirty(chat_id)
+
+
+def pending(chat_id):
+    game = db.games.get(chat_id)
+    return len(game.get(KEY) or ()) if game is not None else 0
+
+
+# Runs every queued action for the game with `powers` (role_id -> fn, engine.roles.POWERS);
+# returns [(user_id, target_id, result text)]
+def resolve(chat_id, powers):
+    queued = discard(chat_id)
+    if not queued:
+        return []
+    persist.mark_dirty(chat_id)
+
+    ordered = sorted(queued.items(), key=lambda item: item[1][0])  # stable: click order within a tier
+    results = []
+    for user_id, (_, role_id, target_id, target_username) in ordered:
+        power_fn = powers[role_id]
+        if power_fn is None:
+            continue
+        try:
+            results.append((user_id, target_id, power_fn(user_id, target_id, target_username)))
+        except Exception as e:
+            print(f"[WARN] Night action by {user_id} failed: {e}")
+    return results
+
+
+def discard(chat_id):
+    game = db.games.get(chat_id)
+    return game.pop(KEY, None) if game is not None else None
+
+
+lifecycle.register("night_actions", discard)
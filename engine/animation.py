@@ -1,23 +1,106 @@
-# animation.py (converted for Application API)
+# animation.py — text animations played by one shared ticker
+#
+# Starting an animation sends its first frame and returns; the frame edits are
+# made by a single ticker on the shared timer wheel, which advances every live
+# animation each tick. When the outbox is backed up, animations skip straight
+# to their final frame instead of adding more edits to the queue.
 
-import asyncio
+import time
 from telegram import Bot
+from engine import outbox, timers
+
+FRAME_INTERVAL = 1.5    # seconds between frames of one animation
+TICK = 0.5              # how often the shared ticker looks for due frames
+SKIP_BACKLOG = outbox.BACKLOG_SOFT_LIMIT // 4  # outbox depth at which animations jump to their last frame
+
+DARK_FANTASY = (
+    "🌑 *The sky turns pitch black...*",
+    "🩸 *A blood moon rises above the ruins...*",
+    "👁️‍🗨️ *Eyes blink from the shadows... watching...*",
+    "🕸️ *Whispers coil around your soul...*",
+    "🖤 *The forgotten curse stirs once again...*",
+    "🩸 *It. Has. Begun.* 🩸",
+)
+
+stats = {"started": 0, "frames": 0, "skipped": 0}
+
+_active = {}  # (chat_id, message_id) -> _Reel
+_ticker = None
+
+
+class _Reel:
+    __slots__ = ("bot", "chat_id", "message_id", "frames", "shown", "next_at")
+
+    def __init__(self, bot, chat_id, message_id, frames):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.frames = frames
+        self.shown = 0
+        self.next_at = time.monotonic() + FRAME_INTERVAL
+
+
+def backed_up():
+    return outbox.snapshot()["depth"] >= SKIP_BACKLOG
+
+
+# Sends the first frame (or only the last one, under backlog) and returns at once
+async def play(bot: Bot, chat_id: int, frames=DARK_FANTASY):
+    stats["started"] += 1
+    if backed_up():
+        stats["skipped"] += 1
+        outbox.post(bot, "send_message", outbox.ANIMATION, chat_id=chat_id, text=frames[-1], parse_mode="Markdown")
+        return
+    first = outbox.post(bot, "send_message", outbox.ANIMATION, chat_id=chat_id, text=frames[0], parse_mode="Markdown")
+    first.add_done_callback(lambda future: _register(future, bot, chat_id, frames))
+
 
 async def dark_fantasy_animation(bot: Bot, chat_id: int):
-    frames = [
-        "🌑 *The sky turns pitch black...*",
-        "🩸 *A blood moon rises above the ruins...*",
-        "👁️‍🗨️ *Eyes blink from the shadows... watching...*",
-        "🕸️ *Whispers coil around your soul...*",
-        "🖤 *The forgotten curse stirs once again...*",
-        "🩸 *It. Has. Begun.* 🩸"
-    ]
-
-    msg = await bot.send_message(chat_id=chat_id, text=frames[0], parse_mode="Markdown")
-
-    for frame in frames[1:]:
-        await asyncio.sleep(1.5)
-        try:
-            await bot.edit_message_text(chat_id=chat_id, message_id=msg.message_id, text=frame, parse_mode="Markdown")
-        except Exception as e:
-            print(f"[WARN] Animation edit failed: {e}")
+    await play(bot, chat_id, DARK_FANTASY)
+
+
+def _register(future, bot, chat_id, frames):
+    if future.cancelled() or future.exception() is not None:
+        return
+    msg = future.result()
+    if msg is None:  # dropped under backlog
+        return
+    _active[(chat_id, msg.message_id)] = _Reel(bot, chat_id, msg.message_id, frames)
+    _ensure_ticker()
+
+
+# -- Ticker --
+def _ensure_ticker():
+    global _ticker
+    if _ticker is None:
+        _ticker = timers.wheel.call_later(TICK, _tick)
+        timers.wheel.start()
+
+
+def _tick():
+    global _ticker
+    _ticker = None
+    now = time.monotonic()
+    skip = backed_up()
+    for key, reel in list(_active.items()):
+        if skip:
+            stats["skipped"] += 1
+            reel.shown = len(reel.frames) - 1
+        elif reel.next_at <= now:
+            reel.shown += 1
+            reel.next_at = now + FRAME_INTERVAL
+        else:
+            continue
+        _show(reel)
+        if reel.shown >= len(reel.frames) - 1:
+            del _active[key]
+    if _active:
+        _ensure_ticker()
+
+
+def _show(reel):
+    stats["frames"] += 1
+    outbox.post(
+        reel.bot, "edit_message_text", outbox.ANIMATION, merge_key=(reel.chat_id, reel.message_id),
+        chat_id=reel.chat_id, message_id=reel.message_id, text=reel.frames[reel.shown], parse_mode="Markdown"
+    )
@@ -0,0 +1,155 @@
+# callbackdata.py — compact, versioned inline-button payloads
+#
+# A payload is the format version, a one-character action code, then the
+# action's fields joined by "|": "1v2nm189" is a vote for user 160591545.
+# Integers are packed in base 36. A "str" field may contain "|" only when it
+# is the action's last field. Telegram caps callback_data at 64 bytes.
+#
+# decode() also accepts the older "<action>_<args>" payloads, so buttons
+# already on screen when the bot is upgraded keep working.
+
+VERSION = "1"
+MAX_BYTES = 64
+
+# action -> (code, field types)
+ACTIONS = {
+    "join": ("j", ()),
+    "vote": ("v", ("int",)),
+    "usepower": ("p", ("int",)),
+    "page": ("n", ("str", "int")),
+    "echo_vote": ("e", ("str",)),
+    "useitem": ("i", ("str",)),
+    "task_complete": ("t", ("str",)),
+    "task_abandon": ("a", ()),
+    "check_win": ("w", ()),
+    "whisper": ("s", ("int",)),
+}
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _pack_int(n):
+    if n < 0:
+        return "-" + _pack_int(-n)
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = _DIGITS[r] + out
+        if not n:
+            return out
+
+
+def encode(action, *args):
+    code, fields = ACTIONS[action]
+    if len(args) != len(fields):
+        raise ValueError(f"{action} takes {len(fields)} fields, got {len(args)}")
+
+    parts = []
+    for i, (kind, value) in enumerate(zip(fields, args)):
+        if kind == "int":
+            parts.append(_pack_int(int(value)))
+        else:
+            value = str(value)
+            if "|" in value and i < len(fields) - 1:
+                raise ValueError(f"{action}: '|' is only allowed in the last field")
+            parts.append(value)
+
+    data = VERSION + code + "|".join(parts)
+    if len(data.encode()) > MAX_BYTES:
+        raise ValueError(f"{action} payload is over {MAX_BYTES} bytes")
+    return data
+
+
+# -- Decoding --
+# Each action gets its own parser up front, so decoding is one dict lookup and
+# one specialised call. Parsers raise ValueError on a malformed payload.
+def _compile(fields):
+    if not fields:
+        def parse(rest):
+            if rest:
+                raise ValueError("unexpected fields")
+            return ()
+    elif fields == ("int",):
+        def parse(rest):
+            return (int(rest, 36),)
+    elif fields == ("str",):
+        def parse(rest):
+            if not rest:
+                raise ValueError("empty field")
+            return (rest,)
+    else:
+        def parse(rest):
+            raw = rest.split("|", len(fields) - 1)
+            if len(raw) != len(fields):
+                raise ValueError("wrong field count")
+            values = []
+            for kind, value in zip(fields, raw):
+                if kind == "int":
+                    value = int(value, 36)
+                elif not value:
+                    raise ValueError("empty field")
+                values.append(value)
+            return tuple(values)
+    return parse
+
+
+# version + action code -> (action, parser)
+_BY_PREFIX = {VERSION + code: (action, _compile(fields)) for action, (code, fields) in ACTIONS.items()}
+
+
+# Returns (action, (fields...)) or None for anything malformed
+def decode(data):
+    entry = _BY_PREFIX.get(data[:2]) if data else None
+    if entry is None:
+        return _decode_legacy(data) if data and data[0] != VERSION else None
+    try:
+        return entry[0], entry[1](data[2:])
+    except ValueError:
+        return None
+
+
+# -- Pre-versioned payloads --
+def _legacy_int(rest):
+    return (int(rest),)
+
+
+def _legacy_page(rest):
+    code, page = rest.split("_")
+    return code, int(page)
+
+
+def _legacy_tail(rest):
+    return (rest,)
+
+
+# first "_" token -> (action, parser of the remainder)
+_LEGACY = {
+    "vote": ("vote", _legacy_int),
+    "usepower": ("usepower", _legacy_int),
+    "page": ("page", _legacy_page),
+    "echo": ("echo_vote", lambda rest: (rest[len("vote_"):],) if rest.startswith("vote_") else None),
+    "useitem": ("useitem", _legacy_tail),
+    "task": ("task", None),
+    "whisper": ("whisper", _legacy_int),
+}
+
+
+def _decode_legacy(data):
+    if data == "join" or data == "check_win":
+        return data, ()
+
+    head, _, rest = data.partition("_")
+    entry = _LEGACY.get(head)
+    if entry is None or not rest:
+        return None
+    action, parse = entry
+    if action == "task":
+        kind, _, rest = rest.partition("_")
+        if kind == "complete":
+            return ("task_complete", (rest,)) if rest else None  # codes may contain "_" (say_stars)
+        return ("task_abandon", ()) if kind == "abandon" else None
+
+    try:
+        values = parse(rest)
+    except ValueError:
+        return None
+    return (action, values) if values else None
@@ -0,0 +1,69 @@
+# catalog.py — immutable role catalog, loaded once from roles.json
+#
+# Every role's faction, description, power handler, action priority and win
+# check live in engine/roles.json. Roles are keyed by their storage.records.Role
+# id, so hot paths index tuples instead of comparing strings. Power handlers
+# and win checks are named in the data file and bound by the modules that
+# define them (engine.roles and engine.win) via bind().
+
+import json
+import os
+from collections import namedtuple
+from types import MappingProxyType
+from storage.records import Role, ROLE_IDS, intern_faction, intern_role
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), "roles.json")
+
+RoleSpec = namedtuple(
+    "RoleSpec",
+    ["id", "name", "faction", "faction_id", "description", "power", "priority", "powerless", "win"],
+)
+# cached: the check depends only on the player's own state, so it can be evaluated
+# when that state changes instead of on every winner check
+WinSpec = namedtuple("WinSpec", ["role_id", "check", "order", "message", "cached"])
+
+
+def _load():
+    with open(DATA_FILE, encoding="utf-8") as f:
+        entries = json.load(f)["roles"]
+
+    specs = [None] * len(Role)
+    for entry in entries:
+        role_id = ROLE_IDS.get(entry["name"])
+        if role_id is None:
+            raise ValueError(f"roles.json: unknown role '{entry['name']}'")
+        win = entry.get("win")
+        specs[role_id] = RoleSpec(
+            id=role_id,
+            name=entry["name"],
+            faction=entry["faction"],
+            faction_id=intern_faction(entry["faction"]),
+            description=entry["description"],
+            power=entry["power"],
+            priority=entry.get("priority", 2),
+            powerless=entry.get("powerless", False),
+            win=WinSpec(role_id, win["check"], win["order"], win["message"], win.get("cached", False)) if win else None,
+        )
+    return tuple(specs), tuple(entry["name"] for entry in entries)
+
+
+ROLES, POOL = _load()                   # ROLES[role_id] -> RoleSpec (None for Role.NONE)
+BY_NAME = MappingProxyType({spec.name: spec for spec in ROLES if spec})
+WIN_ORDER = tuple(sorted((spec.win for spec in ROLES if spec and spec.win), key=lambda w: w.order))
+
+
+def spec(role_name):
+    return ROLES[intern_role(role_name)]
+
+
+# Resolves handler names against a module namespace into a role_id-indexed tuple
+def bind(namespace, attr):
+    table = []
+    for role_spec in ROLES:
+        name = getattr(role_spec, attr) if role_spec else None
+        if attr == "win" and name is not None:
+            name = name.check
+        if name is not None and name not in namespace:
+            raise ValueError(f"roles.json: no handler '{name}' for {role_spec.name}")
+        table.append(namespace[name] if name is not None else None)
+    return tuple(table)
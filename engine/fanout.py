@@ -0,0 +1,38 @@
+# fanout.py — concurrent DM delivery through the outbound queue
+
+import asyncio
+from engine import outbox
+
+MAX_CONCURRENCY = 10    # DMs in flight per fan-out
+
+
+# -- Fan-out --
+# `sends` is an iterable of (chat_id, send_message kwargs). Messages for the same
+# recipient keep their order; different recipients are served concurrently.
+# Rate limiting happens in the outbox workers (see engine/ratelimit.py).
+# Returns {chat_id: None on success, or the exception that stopped delivery}.
+async def fan_out(bot, sends, priority=outbox.PHASE, concurrency=MAX_CONCURRENCY):
+    per_chat = {}
+    for chat_id, kwargs in sends:
+        per_chat.setdefault(chat_id, []).append(kwargs)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    async def deliver(chat_id, messages):
+        async with semaphore:
+            try:
+                for kwargs in messages:
+                    await outbox.submit(bot, "send_message", priority, chat_id=chat_id, **kwargs)
+                results[chat_id] = None
+            except Exception as e:
+                results[chat_id] = e
+
+    await asyncio.gather(*(deliver(cid, msgs) for cid, msgs in per_chat.items()))
+    return results
+
+
+def report_failures(results, what):
+    for chat_id, error in results.items():
+        if error is not None:
+            print(f"[WARN] Could not send {what} to {chat_id}: {error}")
@@ -1,6 +1,8 @@
 # inventory.py (converted for Application API)
 
 from storage import database as db
+from storage import index
+from engine import win, lifecycle
 
 def use_item(user_id, item_name):
     inventory = db.get_inventory(user_id)
@@ -36,6 +38,7 @@ def use_item(user_id, item_name):
     # 🕒 Set Cooldown and Remove Item
     db.set_item_cooldown(user_id, item_name, duration=120)  # 2 minutes cooldown
     db.remove_item(user_id, item_name)
+    win.touch(index.get_chat_id_by_user(user_id), user_id)
 
     return response
 
@@ -48,3 +51,14 @@ def describe_item(item_name):
         "core_key": "⚙️ Nexus Guild can use this to trigger victory."
     }
     return descriptions.get(item_name, "❓ An unknown item.")
+
+
+# Teardown: items do not carry over into the player's next game
+def _drop_items(user_id):
+    inventory = db.get_inventory(user_id)  # the stored item -> quantity dict
+    items = list(inventory or ())
+    if items:
+        inventory.clear()  # every unit, not one per item name
+    return items
+
+lifecycle.register("inventory", _drop_items, per_player=True)
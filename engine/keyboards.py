@@ -0,0 +1,61 @@
+# keyboards.py — paginated target keyboards shared by every recipient in a phase
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from storage import index
+from engine import callbackdata, lifecycle
+
+PAGE_SIZE = 8
+
+LABELS = {
+    "vote": "Vote: {}",
+    "usepower": "Use Power on {}",
+}
+KIND_CODES = {"vote": "v", "usepower": "p"}
+CODE_KINDS = {code: kind for kind, code in KIND_CODES.items()}
+
+_cache = {}  # (chat_id, kind) -> (alive players tuple, [markup per page])
+
+
+# All pages for one chat and button kind, rebuilt only when the alive set changes.
+# They list every living player; handle_callback rejects self-targeting.
+# Navigation buttons carry the kind code and page number (see engine/callbackdata.py).
+def target_pages(chat_id, kind, alive_players):
+    alive = tuple(alive_players)
+    cached = _cache.get((chat_id, kind))
+    if cached and cached[0] == alive:
+        return cached[1]
+
+    label = LABELS[kind]
+    code = KIND_CODES[kind]
+    buttons = [
+        InlineKeyboardButton(label.format(index.get_username(uid) or f"user{uid}"), callback_data=callbackdata.encode(kind, uid))
+        for uid in alive
+    ]
+    chunks = [buttons[i:i + PAGE_SIZE] for i in range(0, len(buttons), PAGE_SIZE)] or [[]]
+
+    pages = []
+    for n, chunk in enumerate(chunks):
+        rows = [[button] for button in chunk]
+        nav = []
+        if n > 0:
+            nav.append(InlineKeyboardButton("◀️ Prev", callback_data=callbackdata.encode("page", code, n - 1)))
+        if n < len(chunks) - 1:
+            nav.append(InlineKeyboardButton("Next ▶️", callback_data=callbackdata.encode("page", code, n + 1)))
+        if nav:
+            rows.append(nav)
+        pages.append(InlineKeyboardMarkup(rows))
+
+    _cache[(chat_id, kind)] = (alive, pages)
+    return pages
+
+
+def target_keyboard(chat_id, kind, alive_players, page=0):
+    pages = target_pages(chat_id, kind, alive_players)
+    return pages[min(max(page, 0), len(pages) - 1)]
+
+
+def invalidate(chat_id):
+    return [_cache.pop((chat_id, kind), None) for kind in LABELS]
+
+
+lifecycle.register("keyboards", invalidate)
@@ -0,0 +1,127 @@
+# lifecycle.py — one place that tears a game down
+#
+# end_game() drops every piece of per-game and per-player state the engine
+# keeps. Each module that holds such state registers its own teardown with
+# register() when it is imported (phase bookkeeping, live tally, win state,
+# phrase watches, cached keyboards, roster edits, tasks, inventories...);
+# end_game() then cancels the game's deadlines and drops its index entries and
+# the game itself. It runs when a game is won, cancelled, or left idle past
+# IDLE_TTL with nothing scheduled. Each teardown reports how many objects and
+# roughly how many bytes it released.
+
+import sys
+import time
+from storage import database as db
+from storage import index
+from engine import timers
+
+IDLE_TTL = 30 * 60      # seconds without activity before a game with no deadline is reaped
+SWEEP_INTERVAL = 60
+
+stats = {"games_ended": 0, "idle_reaped": 0, "objects_reclaimed": 0, "bytes_reclaimed": 0}
+
+_hooks = {}        # name -> (fn, per_player): fn(chat_id) or fn(user_id), returns what it dropped
+_last_active = {}  # chat_id -> monotonic time of the last player action or phase change
+_sweeper = None
+
+
+# Call at import time from any module that keeps state per game (or, with
+# per_player, per seated player); re-registering a name replaces its hook.
+def register(name, fn, per_player=False):
+    _hooks[name] = (fn, per_player)
+
+
+def touch(chat_id):
+    if chat_id is not None:
+        _last_active[chat_id] = time.monotonic()
+
+
+# -- Teardown --
+# Returns {"objects": n, "bytes": n} for what was released
+def end_game(chat_id, reason="finished"):
+    game = db.games.get(chat_id)
+    players = list(game.get("players", {})) if game else []
+
+    dropped = [game, _last_active.pop(chat_id, None)]
+    for name, (fn, per_player) in list(_hooks.items()):
+        try:
+            if per_player:
+                dropped.extend(fn(user_id) for user_id in players)
+            else:
+                dropped.append(fn(chat_id))
+        except Exception as e:
+            print(f"[WARN] Teardown hook '{name}' failed for {chat_id}: {e}")
+    deadlines = timers.cancel_all(chat_id)
+
+    if game is not None:
+        index.cancel_game(chat_id)
+
+    objects, size = _measure(dropped)
+    objects += len(deadlines)
+    stats["games_ended"] += 1
+    stats["objects_reclaimed"] += objects
+    stats["bytes_reclaimed"] += size
+    if reason == "idle":
+        stats["idle_reaped"] += 1
+    return {"objects": objects, "bytes": size}
+
+
+# Ends every game idle for longer than `ttl` that has nothing scheduled
+def reap_idle(ttl=IDLE_TTL):
+    now = time.monotonic()
+    reaped = []
+    for chat_id in list(db.games):
+        last = _last_active.setdefault(chat_id, now)  # first sighting (e.g. restored) starts the clock
+        if now - last > ttl and not timers.has_pending(chat_id):
+            end_game(chat_id, "idle")
+            reaped.append(chat_id)
+    if reaped:
+        print(f"[INFO] Reaped {len(reaped)} idle games")
+    return reaped
+
+
+def _sweep():
+    global _sweeper
+    try:
+        reap_idle()
+    except Exception as e:
+        print(f"[WARN] Idle sweep failed: {e}")
+    _sweeper = timers.wheel.call_later(SWEEP_INTERVAL, _sweep)
+
+
+# Use from Application post_init; the sweep rides the shared timer wheel
+async def start(application=None):
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = timers.wheel.call_later(SWEEP_INTERVAL, _sweep)
+        timers.wheel.start()
+
+
+# -- Accounting --
+# Walks plain containers and the engine's own slotted records; anything else
+# (bots, markups, functions) is counted at its shallow size.
+def _measure(roots):
+    seen = set()
+    stack = [obj for obj in roots if obj is not None]
+    objects = size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        objects += 1
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif type(obj).__module__.startswith(("engine.", "storage.")):
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    value = getattr(obj, slot, None)
+                    if value is not None:
+                        stack.append(value)
+            stack.extend(getattr(obj, "__dict__", {}).values())
+    return objects, size
@@ -0,0 +1,86 @@
+# media.py — send phase animations by cached Telegram file_id
+#
+# The first send of an asset goes out by URL, which makes Telegram fetch and
+# transcode it. The file_id in that reply is remembered (and written to the
+# SQLite store when storage.persist is enabled) so every later send reuses the
+# uploaded file. If Telegram rejects a cached id, it is dropped and that send
+# is retried once by URL; the retry's reply re-seeds the cache.
+
+import asyncio
+from telegram.error import BadRequest
+from storage import persist
+from engine import outbox
+
+ASSETS = {
+    "begin": "https://media.giphy.com/media/QBd2kLB5qDmysEXre9/giphy.gif",
+    "night": "https://media.giphy.com/media/VbnUQpnihPSIgIXuZv/giphy.gif",
+    "day": "https://media.giphy.com/media/3oEjHG3rG7HrzUpt7W/giphy.gif",
+}
+
+stats = {"cached_sends": 0, "url_sends": 0, "rejected": 0}
+
+_file_ids = {}  # asset URL -> file_id
+_loaded = False
+
+
+def file_id(url):
+    global _loaded
+    if not _loaded:
+        _loaded = True
+        _file_ids.update(persist.load_media())
+    return _file_ids.get(url)
+
+
+def remember(url, new_id):
+    if not new_id or _file_ids.get(url) == new_id:
+        return
+    _file_ids[url] = new_id
+    if persist.enabled():
+        asyncio.get_running_loop().run_in_executor(None, persist.save_media, url, new_id)
+
+
+def forget(url):
+    _file_ids.pop(url, None)
+    if persist.enabled():
+        asyncio.get_running_loop().run_in_executor(None, persist.delete_media, url)
+
+
+# Fire-and-forget like outbox.post; `asset` is a key of ASSETS or a URL
+def post_animation(bot, chat_id, asset, priority=outbox.ANIMATION):
+    url = ASSETS.get(asset, asset)
+    cached = file_id(url)
+    if cached:
+        stats["cached_sends"] += 1
+        future = outbox.submit(bot, "send_animation", priority, chat_id=chat_id, animation=cached)
+    else:
+        stats["url_sends"] += 1
+        future = outbox.submit(bot, "send_animation", priority, chat_id=chat_id, animation=url)
+    future.add_done_callback(_on_sent(bot, chat_id, url, cached, priority))
+    return future
+
+
+def _on_sent(bot, chat_id, url, cached, priority):
+    def callback(future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            remember(url, _sent_file_id(future.result()))
+        elif cached and isinstance(error, BadRequest):
+            stats["rejected"] += 1
+            print(f"[WARN] Cached file_id for {url} rejected ({error}); resending by URL")
+            if _file_ids.get(url) == cached:
+                forget(url)
+            post_animation(bot, chat_id, url, priority)
+        else:
+            print(f"[WARN] Outbound send_animation to {chat_id} failed: {error}")
+    return callback
+
+
+# GIFs come back as animation, or as document when Telegram does not convert them
+def _sent_file_id(message):
+    for kind in ("animation", "document", "video"):
+        media = getattr(message, kind, None)
+        if media is not None:
+            return getattr(media, "file_id", None)
+    return None
@@ -0,0 +1,271 @@
+# metrics.py — handler latency, error and API-call metrics in Prometheus text format
+#
+# Disabled unless AETHER_METRICS_PORT is set: the decorators then hand back the
+# undecorated function and the outbox hook is a single flag check. When enabled,
+# every handler call records its latency, errors and the Bot API calls it
+# made; gauges (games in flight, players per phase, outbox depth) are read
+# only when /metrics is scraped.
+#
+# Outbox traffic is counted when it is queued. Calls handlers make directly
+# (query.answer, reply_text, edits) are counted by the request object that
+# with_api_counting() installs on the ApplicationBuilder.
+
+import asyncio
+import functools
+import os
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from telegram.request import HTTPXRequest
+from storage import database as db
+
+PORT = os.environ.get("AETHER_METRICS_PORT")
+ENABLED = bool(PORT)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CALL_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+MAX_SERIES = 200  # label sets per metric; later ones are folded into branch="other"
+
+_counters = {}      # name -> {labels: value}
+_histograms = {}    # name -> {labels: [bucket counts..., sum, count]}
+_bounds = {}        # histogram name -> bucket bounds
+_help = {}
+_api_calls = ContextVar("aether_api_calls", default=None)
+_outbox_task = ContextVar("aether_outbox_task", default=False)  # sends already counted at submit
+_server = None
+
+
+def _series(table, name, labels):
+    series = table.setdefault(name, {})
+    if labels not in series and len(series) >= MAX_SERIES:
+        labels = tuple((k, "other" if k == "branch" else v) for k, v in labels)
+    return series, labels
+
+
+def inc(name, labels=(), amount=1):
+    series, labels = _series(_counters, name, labels)
+    series[labels] = series.get(labels, 0) + amount
+
+
+def observe(name, labels, value, buckets=LATENCY_BUCKETS):
+    series, labels = _series(_histograms, name, labels)
+    row = series.get(labels)
+    if row is None:
+        _bounds.setdefault(name, buckets)
+        row = series[labels] = [0] * (len(buckets) + 2)
+    bounds = _bounds[name]
+    i = bisect_left(bounds, value)
+    if i < len(bounds):
+        row[i] += 1
+    row[-2] += value
+    row[-1] += 1
+
+
+def describe(name, text):
+    _help[name] = text
+
+
+# -- Instrumentation --
+# Wraps a PTB handler. `branch` is a fixed label or fn(update) -> label;
+# it defaults to the function name.
+def instrumented(handler, branch=None):
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(update, context):
+            label = branch(update) if callable(branch) else branch or fn.__name__
+            labels = (("handler", handler), ("branch", label))
+            calls = [0]
+            token = _api_calls.set(calls)
+            started = time.perf_counter()
+            try:
+                return await fn(update, context)
+            except Exception:
+                inc("aether_handler_errors_total", labels)
+                raise
+            finally:
+                observe("aether_handler_seconds", labels, time.perf_counter() - started)
+                observe("aether_api_calls_per_update", labels, calls[0], CALL_BUCKETS)
+                _api_calls.reset(token)
+        return wrapper
+    return decorate
+
+
+# Wraps a coroutine that is not a PTB handler, e.g. a phase transition
+def timed(kind, name):
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            labels = ((kind, name),)
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                inc(f"aether_{kind}_errors_total", labels)
+                raise
+            finally:
+                observe(f"aether_{kind}_seconds", labels, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+# Called by the outbox for every queued Bot API call, and by CountingRequest
+# for every call made outside it
+def api_call(method):
+    inc("aether_api_calls_total", (("method", method),))
+    calls = _api_calls.get()
+    if calls is not None:
+        calls[0] += 1
+
+
+# Called at the top of each outbox worker task
+def outbox_task():
+    _outbox_task.set(True)
+    _api_calls.set(None)
+
+
+_CAMEL = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+class CountingRequest(HTTPXRequest):
+    async def do_request(self, url, method, *args, **kwargs):
+        if not _outbox_task.get():
+            api_call(_CAMEL.sub("_", url.rsplit("/", 1)[-1]).lower())
+        return await super().do_request(url, method, *args, **kwargs)
+
+
+# Wraps an ApplicationBuilder so it counts direct Bot API calls when metrics are enabled
+def with_api_counting(builder, pool_size=256):
+    if not ENABLED:
+        return builder
+    return builder.request(CountingRequest(connection_pool_size=pool_size))
+
+
+def callback_branch(update):
+    from engine import callbackdata
+    decoded = callbackdata.decode(update.callback_query.data)
+    return decoded[0] if decoded else "invalid"
+
+
+def command_branch(update):
+    text = update.message.text if update.message else None
+    token = text.split(maxsplit=1)[0].split("@", 1)[0] if text else ""
+    return token if token.startswith("/") and len(token) <= 32 else "text"
+
+
+# -- Export --
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _gauges():
+    from engine import outbox, lifecycle, media, animation, phases
+    from storage import persist
+
+    players = {}
+    for game in db.games.values():
+        phase = game.get("phase") or ("lobby" if not game.get("started") else "unknown")
+        alive = sum(1 for p in game.get("players", {}).values() if p.get("alive", True))
+        players[phase] = players.get(phase, 0) + alive
+
+    box = outbox.snapshot()
+    yield "aether_games_in_flight", "gauge", "Games held in memory", {(): len(db.games)}
+    yield "aether_players", "gauge", "Living players by game phase", {(("phase", p),): n for p, n in players.items()}
+    yield "aether_outbox_depth", "gauge", "Queued outbound calls by priority", {
+        (("priority", p),): n for p, n in box["depth_by_priority"].items()}
+    yield "aether_outbox_wait_max_seconds", "gauge", "Longest queue wait seen", {(): box["wait_max"]}
+    for key in ("enqueued", "sent", "failed", "dropped", "merged", "retry_after"):
+        yield f"aether_outbox_{key}_total", "counter", f"Outbox items {key}", {(): box[key]}
+    for key, value in lifecycle.stats.items():
+        yield f"aether_lifecycle_{key}_total", "counter", f"Game teardown {key.replace('_', ' ')}", {(): value}
+    for key, value in persist.stats.items():
+        yield f"aether_persist_{key}_total", "counter", f"Write-behind {key}", {(): value}
+    yield "aether_phase_early_ends_total", "counter", "Phases ended before their deadline", {
+        (("phase", p),): totals["count"] for p, totals in phases.early_ends.items()}
+    yield "aether_phase_seconds_saved_total", "counter", "Phase waiting skipped by early ends", {
+        (("phase", p),): totals["seconds_saved"] for p, totals in phases.early_ends.items()}
+    for key, value in media.stats.items():
+        yield f"aether_media_{key}_total", "counter", f"Phase animation {key.replace('_', ' ')}", {(): value}
+    for key, value in animation.stats.items():
+        yield f"aether_text_animation_{key}_total", "counter", f"Text animations {key}", {(): value}
+
+
+def render():
+    lines = []
+    for name, series in sorted(_counters.items()):
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in series.items())
+
+    for name, series in sorted(_histograms.items()):
+        bounds = _bounds[name]
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, row in series.items():
+            running = 0
+            for bound, count in zip(bounds, row):
+                running += count
+                lines.append(f"{name}_bucket{_labels(labels, (('le', bound),))} {running}")
+            lines.append(f"{name}_bucket{_labels(labels, (('le', '+Inf'),))} {row[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {row[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {row[-1]}")
+
+    for name, kind, text, series in _gauges():
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in series.items())
+    return "\n".join(lines) + "\n"
+
+
+async def _serve(reader, writer):
+    try:
+        request = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        path = request.split()[1].decode() if len(request.split()) > 1 else "/"
+        if path.split("?", 1)[0] == "/metrics":
+            body, status = render().encode(), "200 OK"
+        else:
+            body, status = b"not found\n", "404 Not Found"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except Exception as e:
+        print(f"[WARN] Metrics request failed: {e}")
+    finally:
+        writer.close()
+
+
+# Use from Application post_init; binds to localhost only
+async def start(application=None, port=None):
+    global _server
+    port = port or PORT
+    if not port or _server is not None:
+        return
+    _server = await asyncio.start_server(_serve, "127.0.0.1", int(port))
+    print(f"[INFO] Metrics on http://127.0.0.1:{port}/metrics")
+
+
+describe("aether_handler_seconds", "Handler latency by handler and branch")
+describe("aether_handler_errors_total", "Handler calls that raised")
+describe("aether_api_calls_per_update", "Bot API calls queued or made while handling one update")
+describe("aether_api_calls_total", "Bot API calls, through the outbox or made directly by handlers")
+describe("aether_phase_seconds", "Phase transition latency")
+describe("aether_phase_errors_total", "Phase transitions that raised")
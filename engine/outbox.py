@@ -0,0 +1,233 @@
+# outbox.py — one prioritised outbound queue for all Bot API traffic
+
+import asyncio
+import heapq
+import itertools
+import time
+from telegram.error import RetryAfter
+from engine.ratelimit import limiter
+from engine import metrics
+
+# Priority classes: lower goes first
+VOTE = 0        # vote prompts and vote results
+PHASE = 1       # phase announcements, deaths, power prompts
+NOTICE = 2      # player-to-player notices (alliances, trades, tasks)
+LOBBY = 3       # join buttons and roster updates
+FLAVOR = 4      # plot twists, prophecies and other colour text
+ANIMATION = 5   # GIFs and animation frames
+
+WORKERS = 4
+BACKLOG_SOFT_LIMIT = 200    # past this depth, FLAVOR/ANIMATION items are refused
+STALE_AFTER = 15            # seconds a cosmetic item may wait before it is dropped
+MAX_RETRIES = 3
+
+stats = {
+    "enqueued": 0,
+    "sent": 0,
+    "failed": 0,
+    "dropped": 0,
+    "merged": 0,
+    "retry_after": 0,
+    "wait_total": 0.0,
+    "wait_max": 0.0,
+}
+depth_by_priority = {}
+
+_queue = None
+_workers = []
+_loop = None      # event loop the queue and workers belong to
+_seq = itertools.count()
+_pending_merges = {}
+_deferred = {}    # chat_id -> heap of items waiting for that chat's rate limit
+_deferred_count = 0
+_paused_until = 0.0
+
+
+class _Item:
+    __slots__ = ("priority", "bot", "method", "kwargs", "merge_key", "future", "enqueued", "cleared")
+
+    def __init__(self, priority, bot, method, kwargs, merge_key):
+        self.priority = priority
+        self.bot = bot
+        self.method = method
+        self.kwargs = kwargs
+        self.merge_key = merge_key
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+        self.cleared = False  # holds its chat's send token
+
+
+# A fresh event loop (a second asyncio.run in scripts, benchmarks, shard
+# workers) gets its own queue and workers; the old ones died with their loop.
+def _ensure_started():
+    global _queue, _loop, _deferred_count
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        _loop = loop
+        _queue = asyncio.PriorityQueue()
+        _workers.clear()
+        _pending_merges.clear()
+        _deferred.clear()
+        _deferred_count = 0
+        depth_by_priority.clear()
+    if not _workers:
+        for _ in range(WORKERS):
+            _workers.append(asyncio.create_task(_worker()))
+
+
+# -- Enqueue --
+# `merge_key` collapses repeated updates of the same thing (e.g. edits of one message):
+# while an item with that key is still queued, a newer submit replaces its payload.
+def submit(bot, method, priority=PHASE, merge_key=None, **kwargs):
+    _ensure_started()
+    if metrics.ENABLED:
+        metrics.api_call(method)
+
+    if merge_key is not None:
+        pending = _pending_merges.get(merge_key)
+        if pending is not None:
+            pending.kwargs = kwargs
+            stats["merged"] += 1
+            return pending.future
+
+    item = _Item(priority, bot, method, kwargs, merge_key)
+    if priority >= FLAVOR and _queue.qsize() + _deferred_count >= BACKLOG_SOFT_LIMIT:
+        stats["dropped"] += 1
+        _settle(item.future, None)
+        return item.future
+
+    if merge_key is not None:
+        _pending_merges[merge_key] = item
+    stats["enqueued"] += 1
+    _enqueue(item)
+    return item.future
+
+
+def _enqueue(item):
+    depth_by_priority[item.priority] = depth_by_priority.get(item.priority, 0) + 1
+    _queue.put_nowait((item.priority, next(_seq), item))
+
+
+# Fire-and-forget variant, safe to call from sync code running inside the event loop
+def post(bot, method, priority=FLAVOR, merge_key=None, **kwargs):
+    future = submit(bot, method, priority, merge_key, **kwargs)
+    future.add_done_callback(_log_failure(method, kwargs.get("chat_id")))
+    return future
+
+
+def _log_failure(method, chat_id):
+    def callback(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"[WARN] Outbound {method} to {chat_id} failed: {future.exception()}")
+    return callback
+
+
+# -- Delivery --
+def _settle(future, result=None, error=None):
+    if future.done():  # the awaiting caller was cancelled
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+# -- Per-chat limits --
+# A chat over its rate is parked here instead of holding a worker: its items
+# wait in priority order and are put back on the queue one token at a time.
+def _clear(item):
+    global _deferred_count
+    chat_id = item.kwargs.get("chat_id")
+    if chat_id is None:  # not a chat send, e.g. answer_callback_query
+        return True
+    waiting = _deferred.get(chat_id)
+    if waiting is None:
+        if limiter.try_chat(chat_id):
+            return True
+        waiting = _deferred[chat_id] = []
+        _loop.call_later(limiter.chat_ready_in(chat_id), _release, chat_id)
+    heapq.heappush(waiting, (item.priority, next(_seq), item))
+    _deferred_count += 1
+    return False
+
+
+def _release(chat_id):
+    global _deferred_count
+    waiting = _deferred.get(chat_id)
+    if not waiting:
+        _deferred.pop(chat_id, None)
+        return
+    if limiter.try_chat(chat_id):
+        _, _, item = heapq.heappop(waiting)
+        _deferred_count -= 1
+        item.cleared = True
+        _enqueue(item)
+        if not waiting:
+            del _deferred[chat_id]
+            return
+    _loop.call_later(limiter.chat_ready_in(chat_id), _release, chat_id)
+
+
+async def _worker():
+    global _paused_until
+    metrics.outbox_task()
+    while True:
+        _, _, item = await _queue.get()
+        depth_by_priority[item.priority] -= 1
+
+        waited = time.monotonic() - item.enqueued
+        if item.priority >= FLAVOR and waited > STALE_AFTER:
+            _unmerge(item)
+            stats["dropped"] += 1
+            _settle(item.future, None)
+            continue
+        if not item.cleared and not _clear(item):
+            continue  # parked until its chat has a token
+        _unmerge(item)
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+
+        for attempt in range(MAX_RETRIES + 1):
+            pause = _paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            # Only the global budget is waited on here; busy chats never hold a worker
+            await limiter.acquire_global()
+            try:
+                result = await getattr(item.bot, item.method)(**item.kwargs)
+            except RetryAfter as e:
+                # Flood control applies to the whole bot, so every worker backs off
+                stats["retry_after"] += 1
+                delay = e.retry_after
+                delay = delay.total_seconds() if hasattr(delay, "total_seconds") else float(delay)
+                _paused_until = max(_paused_until, time.monotonic() + delay * (1 + attempt * 0.5))
+                if attempt == MAX_RETRIES:
+                    stats["failed"] += 1
+                    _settle(item.future, error=e)
+            except Exception as e:
+                stats["failed"] += 1
+                _settle(item.future, error=e)
+                break
+            else:
+                stats["sent"] += 1
+                _settle(item.future, result)
+                break
+
+
+# Once an item leaves the queue for good, later submits with its key start a new item
+def _unmerge(item):
+    if item.merge_key is not None and _pending_merges.get(item.merge_key) is item:
+        del _pending_merges[item.merge_key]
+
+
+# -- Export --
+def snapshot():
+    sent = stats["sent"] + stats["failed"]
+    return {
+        "depth": (_queue.qsize() if _queue is not None else 0) + _deferred_count,
+        "deferred": _deferred_count,
+        "deferred_chats": len(_deferred),
+        "depth_by_priority": dict(depth_by_priority),
+        "wait_avg": stats["wait_total"] / sent if sent else 0.0,
+        **stats,
+    }
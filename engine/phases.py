@@ -1,16 +1,34 @@
 # phases.py (converted for Application API)
 
 import random
+import time
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 from storage import database as db
-from engine.roles import assign_roles
+from storage import persist
+from storage import index
+from engine.roles import assign_roles, POWERS
 from engine.tasks import assign_task
-from collections import Counter
+from engine.fanout import fan_out, report_failures
+from engine import outbox, roster, keyboards, timers, tally, actions, catalog, win, metrics, callbackdata, lifecycle, media
 
 twist_counter = {}
 active_vote_buttons = {}
 pending_powers = {}
+phase_started = {}     # chat_id -> monotonic time the current phase opened
+time_saved = {}        # chat_id -> seconds of waiting skipped by early phase ends
+early_ends = {"night": {"count": 0, "seconds_saved": 0.0},   # totals over every game, for metrics
+              "day": {"count": 0, "seconds_saved": 0.0}}
+
+NIGHT_SECONDS = 90
+DAY_SECONDS = 90
+
+# Final Echo choice -> button label; the keys are what db.set_echo_vote stores
+ECHO_OPTIONS = {
+    "save_the_core": "Save the Core",
+    "destroy_the_core": "Destroy the Core",
+    "escape_the_core": "Escape the Core",
+}
 
 def get_dawn_story():
     return random.choice([
@@ -27,70 +45,129 @@ def get_night_story():
     ])
 
 # -- Begin Game --
+@metrics.timed("phase", "begin")
 async def begin_game(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    await roster.flush(context.bot, chat_id)
     if not db.is_game_active(chat_id):
-        await context.bot.send_message(chat_id, "⚠️ Game was cancelled or never started.")
+        await outbox.submit(context.bot, "send_message", outbox.PHASE, chat_id=chat_id, text="⚠️ Game was cancelled or never started.")
         return
     if db.has_game_started(chat_id):
-        await context.bot.send_message(chat_id, "⚠️ Game already started.")
+        await outbox.submit(context.bot, "send_message", outbox.PHASE, chat_id=chat_id, text="⚠️ Game already started.")
         return
     players = db.get_player_list(chat_id)
     if len(players) < 3:
-        await context.bot.send_message(chat_id, "❌ Not enough players to begin. Minimum 3 required.")
+        await outbox.submit(context.bot, "send_message", outbox.PHASE, chat_id=chat_id, text="❌ Not enough players to begin. Minimum 3 required.")
         return
 
     db.mark_game_started(chat_id)
+    lifecycle.touch(chat_id)
     assign_roles(chat_id, players, context)
+    win.rebuild(chat_id)
 
-    await context.bot.send_animation(chat_id, animation='https://media.giphy.com/media/QBd2kLB5qDmysEXre9/giphy.gif')
-    await context.bot.send_message(chat_id, "🎮 *The game begins! Night falls...*", parse_mode='Markdown')
+    media.post_animation(context.bot, chat_id, "begin")
+    await outbox.submit(context.bot, "send_message", outbox.PHASE, chat_id=chat_id, text="🎮 *The game begins! Night falls...*", parse_mode='Markdown')
     await start_night_phase(context, chat_id)
 
 # -- Night Phase --
+@metrics.timed("phase", "night")
 async def start_night_phase(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
-    await context.bot.send_animation(chat_id, animation='https://media.giphy.com/media/VbnUQpnihPSIgIXuZv/giphy.gif')
-    await context.bot.send_message(
-        chat_id,
+    media.post_animation(context.bot, chat_id, "night")
+    await outbox.submit(
+        context.bot, "send_message", outbox.PHASE,
+        chat_id=chat_id,
         text=f"🌙 *Night falls.*\n{get_night_story()}\nEach role must act in shadows.",
         parse_mode="Markdown"
     )
 
     db.set_phase(chat_id, "night")
+    lifecycle.touch(chat_id)
     db.expire_effects(chat_id, phase="night")
+    persist.checkpoint(chat_id)
+    phase_started[chat_id] = time.monotonic()
 
     alive_players = db.get_alive_players(chat_id)
-    usernames = {uid: db.get_username(uid) or f"user{uid}" for uid in alive_players}
+    markup = keyboards.target_keyboard(chat_id, "usepower", alive_players)
 
+    sends = []
     for user_id in alive_players:
-        role = db.get_player_role(chat_id, user_id)
-        if role in ["Goat"]:  # no power
+        role = catalog.spec(db.get_player_role(chat_id, user_id))
+        if role is None or role.powerless:  # e.g. the Goat
             continue
 
-        buttons = [
-            [InlineKeyboardButton(f"Use Power on {usernames[target_id]}", callback_data=f"usepower_{target_id}")]
-            for target_id in alive_players if target_id != user_id
-        ]
-        try:
-            await context.bot.send_message(
-                chat_id=user_id,
-                text="🔮 Choose a target to use your power on:",
-                reply_markup=InlineKeyboardMarkup(buttons)
-            )
-        except Exception as e:
-            print(f"[WARN] Could not send power buttons to {user_id}: {e}")
-
-    context.job_queue.run_once(lambda ctx: start_day_phase(ctx, chat_id), when=90)
+        sends.append((user_id, {
+            "text": "🔮 Choose a target to use your power on:",
+            "reply_markup": markup
+        }))
+
+    # Armed before the prompts go out, so an early finish can always cancel it
+    pending_powers[chat_id] = {user_id for user_id, _ in sends}
+    timers.schedule(context, chat_id, "phase", "night_end", NIGHT_SECONDS)
+
+    results = await fan_out(context.bot, sends)
+    report_failures(results, "power buttons")
+
+    # Players we could not reach will never act; don't wait for them
+    for user_id, error in results.items():
+        if error is not None:
+            pending_powers[chat_id].discard(user_id)
+    await _maybe_end_night(context, chat_id)
+
+# Called after a night power resolves; dawn comes once nobody is left to act
+async def power_used(context: ContextTypes.DEFAULT_TYPE, chat_id: int, user_id: int):
+    pending = pending_powers.get(chat_id)
+    if pending is None or user_id not in pending:
+        return
+    pending.discard(user_id)
+    await _maybe_end_night(context, chat_id)
+
+async def _maybe_end_night(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    if pending_powers.get(chat_id):
+        return
+    # Only the caller that still finds the night deadline pending moves to dawn
+    if not timers.cancel(chat_id, "phase", kind="night_end"):
+        return
+    pending_powers.pop(chat_id, None)
+    _record_time_saved(chat_id, "night", NIGHT_SECONDS)
+    await start_day_phase(context, chat_id)
+
+# A player left mid-game (fled, or died outside the dawn and tally paths); the
+# phase they were holding open may now be able to end early
+async def player_left(context: ContextTypes.DEFAULT_TYPE, chat_id: int, user_id: int):
+    win.on_kill(chat_id, user_id)
+    await power_used(context, chat_id, user_id)  # no longer owed a night action
+    if tally.drop_player(chat_id, user_id):
+        await close_day_early(context, chat_id)
+
+def _record_time_saved(chat_id, phase, phase_seconds):
+    started = phase_started.get(chat_id)
+    if started is not None:
+        saved = max(phase_seconds - (time.monotonic() - started), 0)
+        time_saved[chat_id] = time_saved.get(chat_id, 0) + saved
+        totals = early_ends[phase]
+        totals["count"] += 1
+        totals["seconds_saved"] += saved
 
 # -- Day Phase --
+@metrics.timed("phase", "day")
 async def start_day_phase(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    # Night actions land in one ordered pass before deaths are read
+    outcomes = actions.resolve(chat_id, POWERS)
+    if outcomes:
+        persist.checkpoint(chat_id)
+        win.touch(chat_id, *{pid for user_id, target_id, _ in outcomes for pid in (user_id, target_id)})
+        sends = [(user_id, {"text": result}) for user_id, _, result in outcomes]
+        report_failures(await fan_out(context.bot, sends), "night action results")
+
     deaths = db.games[chat_id].pop("deaths", [])
     for uid in deaths:
         db.kill_player(chat_id, uid)
-        await context.bot.send_message(chat_id, f"💀 @{db.get_username(uid)} was found dead at dawn ⚰️...")
+        win.on_kill(chat_id, uid)
+        await outbox.submit(context.bot, "send_message", outbox.PHASE, chat_id=chat_id, text=f"💀 @{index.get_username(uid)} was found dead at dawn ⚰️...")
 
-    await context.bot.send_animation(chat_id, animation='https://media.giphy.com/media/3oEjHG3rG7HrzUpt7W/giphy.gif')
-    await context.bot.send_message(
-        chat_id,
+    media.post_animation(context.bot, chat_id, "day")
+    await outbox.submit(
+        context.bot, "send_message", outbox.PHASE,
+        chat_id=chat_id,
         text=f"🌅 *Day Phase Begins.*\n{get_dawn_story()}\nThe sun rises. Whispers turn to accusations. Discuss and vote wisely.",
         parse_mode='Markdown'
     )
@@ -101,28 +178,25 @@ async def start_day_phase(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
 
     maybe_trigger_plot_twist(chat_id, context)
     db.set_phase(chat_id, "day")
+    lifecycle.touch(chat_id)
     db.reset_votes(chat_id)
     db.expire_effects(chat_id, phase="day")
+    persist.checkpoint(chat_id)
+    phase_started[chat_id] = time.monotonic()
+    pending_powers.pop(chat_id, None)
 
     players = db.get_alive_players(chat_id)
-    usernames = {uid: db.get_username(uid) or f"user{uid}" for uid in players}
+    tally.open_round(chat_id, players)
+    markup = keyboards.target_keyboard(chat_id, "vote", players)
 
+    sends = []
     for user_id in players:
-        vote_buttons = [
-            [InlineKeyboardButton(f"Vote: {usernames[tid]}", callback_data=f"vote_{tid}")]
-            for tid in players if tid != user_id
-        ]
-        try:
-            await context.bot.send_message(
-                chat_id=user_id,
-                text="🗳️ *Vote privately:* Who should be eliminated?",
-                reply_markup=InlineKeyboardMarkup(vote_buttons),
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            print(f"[WARN] Could not send private vote buttons to {user_id}: {e}")
+        sends.append((user_id, {
+            "text": "🗳️ *Vote privately:* Who should be eliminated?",
+            "reply_markup": markup,
+            "parse_mode": "Markdown"
+        }))
 
-    for user_id in players:
         task_roll = random.choice(["phrase", "protect", "abstain"])
         if task_roll == "phrase":
             assign_task(user_id, "Say: The stars remember me.", "say_stars")
@@ -130,21 +204,23 @@ async def start_day_phase(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
             assign_task(user_id, "Keep another player alive for 3 rounds.", "guard_3rounds")
         elif task_roll == "abstain":
             assign_task(user_id, "Avoid voting for two days.", "no_vote2")
-        try:
-            await context.bot.send_message(user_id, "📜 A new task has been assigned.\nUse /mytasks to view it.")
-        except Exception as e:
-            print(f"[WARN] Task DM error to {user_id}: {e}")
+        sends.append((user_id, {"text": "📜 A new task has been assigned.\nUse /mytasks to view it."}))
 
-    context.job_queue.run_once(lambda ctx: tally_votes(ctx, chat_id), when=90)
+    timers.schedule(context, chat_id, "phase", "day_end", DAY_SECONDS)
+
+    # Vote buttons and task notice go out together; one recipient's messages stay in order
+    report_failures(await fan_out(context.bot, sends, outbox.VOTE), "vote buttons / task notice")
 
 # -- Tally Votes --
+@metrics.timed("phase", "tally")
 async def tally_votes(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    live_tally = tally.close(chat_id)
+    lifecycle.touch(chat_id)
     votes = db.games[chat_id].get("votes", {})
     if not votes:
-        await context.bot.send_message(chat_id, "❌ No votes recorded.")
+        await outbox.submit(context.bot, "send_message", outbox.VOTE, chat_id=chat_id, text="❌ No votes recorded.")
         return
 
-    tally = Counter()
     for voter_id in db.get_alive_players(chat_id):
         voted = voter_id in votes
         db.check_abstain(voter_id, voted)
@@ -152,40 +228,47 @@ async def tally_votes(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
     for voter_id, target_id in votes.items():
         db.notify_allies_vote(chat_id, voter_id, target_id, context)
 
-    for voter, target in votes.items():
-        if db.is_player_protected(target): continue
-        if db.is_vote_disabled(chat_id, voter): continue
-        tally[target] += 1
+    counts = live_tally.counts if live_tally else tally.count_votes(chat_id, votes)
 
-    if not tally:
-        await context.bot.send_message(chat_id, "🛡️ All votes were blocked or invalid.")
+    if not counts:
+        await outbox.submit(context.bot, "send_message", outbox.VOTE, chat_id=chat_id, text="🛡️ All votes were blocked or invalid.")
         return
 
-    target_id, count = tally.most_common(1)[0]
+    target_id, count = counts.most_common(1)[0]
     db.kill_player(chat_id, target_id)
-    await context.bot.send_message(chat_id, f"⚖️ @{db.get_username(target_id)} eliminated with {count} votes.")
+    win.on_kill(chat_id, target_id)
+    await outbox.submit(context.bot, "send_message", outbox.VOTE, chat_id=chat_id, text=f"⚖️ @{index.get_username(target_id)} eliminated with {count} votes.")
     db.clear_votes(chat_id)
     db.auto_complete_tasks()
+    win.refresh_rewards(chat_id)
+    persist.checkpoint(chat_id)
 
     # Check win
-    from engine.win import check_for_winner
-    winner = check_for_winner(chat_id)
+    winner = win.check_for_winner(chat_id)
     if winner:
-        await context.bot.send_message(chat_id, f"🏆 *Victory:* {winner}", parse_mode="Markdown")
+        await outbox.submit(context.bot, "send_message", outbox.PHASE, chat_id=chat_id, text=f"🏆 *Victory:* {winner}", parse_mode="Markdown")
+        lifecycle.end_game(chat_id, "finished")
+
+# Called when the last eligible vote lands; skips the rest of the 90s wait.
+# Only the caller that still finds the day deadline pending runs the tally.
+@metrics.timed("phase", "close_day_early")
+async def close_day_early(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    if not timers.cancel(chat_id, "phase", kind="day_end"):
+        return
+    _record_time_saved(chat_id, "day", DAY_SECONDS)
+    await outbox.submit(context.bot, "send_message", outbox.VOTE, chat_id=chat_id, text="🗳️ All votes are in.")
+    await tally_votes(context, chat_id)
 
 # -- Final Echo --
+@metrics.timed("phase", "final_echo")
 async def start_final_echo(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
-    await context.bot.send_message(chat_id, "🌌 *The Core fractures. The Final Echo begins.*", parse_mode="Markdown")
+    await outbox.submit(context.bot, "send_message", outbox.PHASE, chat_id=chat_id, text="🌌 *The Core fractures. The Final Echo begins.*", parse_mode="Markdown")
     players = db.get_alive_players(chat_id)
-    options = ["Save the Core", "Destroy the Core", "Escape the Core"]
-    buttons = [[InlineKeyboardButton(opt, callback_data=f"echo_vote_{opt.lower().replace(' ', '_')}")] for opt in options]
+    buttons = [[InlineKeyboardButton(label, callback_data=callbackdata.encode("echo_vote", choice))] for choice, label in ECHO_OPTIONS.items()]
 
-    for uid in players:
-        await context.bot.send_message(
-            uid,
-            "What will you choose?",
-            reply_markup=InlineKeyboardMarkup(buttons)
-        )
+    markup = InlineKeyboardMarkup(buttons)
+    sends = [(uid, {"text": "What will you choose?", "reply_markup": markup}) for uid in players]
+    report_failures(await fan_out(context.bot, sends, outbox.VOTE), "Final Echo choices")
 
 # -- Plot Twist Handler --
 def maybe_trigger_plot_twist(chat_id: int, context: ContextTypes.DEFAULT_TYPE):
@@ -206,22 +289,33 @@ def maybe_trigger_plot_twist(chat_id: int, context: ContextTypes.DEFAULT_TYPE):
         "Night of Whispers... Votes next round are anonymous."
     ]
     twist = random.choice(twists)
-    context.bot.send_message(chat_id, f"🌪 *Plot Twist!*\n{twist}", parse_mode='Markdown')
+    outbox.post(context.bot, "send_message", outbox.FLAVOR, chat_id=chat_id, text=f"🌪 *Plot Twist!*\n{twist}", parse_mode='Markdown')
 
     if "Memory Wipe" in twist:
         for user_id in db.get_alive_players(chat_id):
             db.abandon_current_task(user_id)
     elif "Echo Swap" in twist:
         players = list(db.games[chat_id]["players"].keys())
-        roles = [db.games[chat_id]["players"][pid]["role"] for pid in players]
+        roles = [db.get_player_role(chat_id, pid) for pid in players]
         random.shuffle(roles)
         for pid, new_role in zip(players, roles):
-            db.games[chat_id]["players"][pid]["role"] = new_role
+            db.assign_role(chat_id, pid, new_role)
+        win.rebuild(chat_id)
 
 def trigger_false_prophecy(chat_id, context):
     prophecy_lines = [
         "🌫️ *A False Vision descends...* The sky whispers lies.",
         "🪞 *Reality fractures...* Not all victories are as they seem.",
     ]
-    context.bot.send_message(chat_id, random.choice(prophecy_lines), parse_mode="Markdown")
+    outbox.post(context.bot, "send_message", outbox.FLAVOR, chat_id=chat_id, text=random.choice(prophecy_lines), parse_mode="Markdown")
     db.games[chat_id]["false_prophecy"] = True
+
+timers.register("begin_game", begin_game)
+timers.register("night_end", start_day_phase)
+timers.register("day_end", tally_votes)
+
+
+def _forget(chat_id):
+    return [store.pop(chat_id, None) for store in (twist_counter, active_vote_buttons, pending_powers, phase_started, time_saved)]
+
+lifecycle.register("phases", _forget)
@@ -0,0 +1,160 @@
+# phrases.py — streaming matcher for "say this phrase" tasks
+#
+# Each game keeps the phrases its players are currently tasked with saying,
+# compiled into one Aho-Corasick automaton, so a group message is scanned in a
+# single pass however many phrase tasks are live. The automaton is rebuilt
+# only when the set of watched phrases changes. Matching is case-insensitive
+# and ignores spacing and end punctuation.
+#
+# Watches are hints: a match is confirmed against the player's stored tasks
+# before anything is completed, so a task finished or wiped elsewhere simply
+# drops its watch on the next match. A player holding the same phrase task
+# twice holds two references to it; each completion releases one.
+#
+# Watches are not saved themselves: the first scan of a game after the process
+# starts rebuilds them from its players' stored tasks, so restored games keep
+# matching.
+
+from storage import database as db
+from engine import lifecycle
+
+# Tasks completed by saying a phrase in the game's group chat: code -> phrase
+TASKS = {
+    "say_stars": "The stars remember me.",
+}
+
+_games = {}      # chat_id -> GameWatch
+_loaded = set()  # chat_ids whose watches were rebuilt from stored tasks since startup
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+class Automaton:
+    __slots__ = ("goto", "fail", "out")
+
+    def __init__(self, phrases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for phrase in phrases:
+            state = 0
+            for ch in phrase:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = self.goto[state][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] = self.out[state] + (phrase,)
+
+        # Breadth-first: a state's failure link points at the longest proper
+        # suffix that is also a path from the root, and inherits its outputs
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def search(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class GameWatch:
+    __slots__ = ("watchers", "automaton")
+
+    def __init__(self):
+        self.watchers = {}      # phrase -> {user_id: [task code, open tasks with this phrase]}
+        self.automaton = None   # None = rebuild before the next scan
+
+
+def watch(chat_id, user_id, phrase, code):
+    if chat_id is None:
+        return
+    game = _games.setdefault(chat_id, GameWatch())
+    phrase = normalize(phrase).rstrip(".!?")
+    users = game.watchers.get(phrase)
+    if users is None:
+        users = game.watchers[phrase] = {}
+        game.automaton = None
+    entry = users.get(user_id)
+    if entry is None:
+        users[user_id] = [code, 1]
+    else:
+        entry[0] = code
+        entry[1] += 1
+
+
+# Releases one reference, or all of them with `everything` (no such task is left)
+def unwatch(chat_id, user_id, phrase, everything=False):
+    game = _games.get(chat_id)
+    if game is None:
+        return
+    users = game.watchers.get(phrase)
+    entry = users.get(user_id) if users is not None else None
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] > 0 and not everything:
+        return
+    del users[user_id]
+    if not users:
+        del game.watchers[phrase]
+        game.automaton = None
+        if not game.watchers:
+            del _games[chat_id]
+
+
+# Replaces the game's watches with one per phrase task its players hold
+def reload(chat_id):
+    _loaded.add(chat_id)
+    _games.pop(chat_id, None)
+    game = db.games.get(chat_id)
+    for user_id in (game.get("players", {}) if game else ()):
+        for task in db.get_tasks(user_id) or ():
+            code = task.get("code")
+            if code in TASKS:
+                watch(chat_id, user_id, TASKS[code], code)
+
+
+# [(user's task code, phrase)] said by `user_id` in this message
+def scan(chat_id, user_id, text):
+    if chat_id not in _loaded:
+        reload(chat_id)
+    game = _games.get(chat_id)
+    if game is None or not text:
+        return []
+    if not any(user_id in users for users in game.watchers.values()):
+        return []
+    if game.automaton is None:
+        game.automaton = Automaton(game.watchers)
+
+    hits = []
+    for phrase in game.automaton.search(normalize(text)):
+        entry = game.watchers[phrase].get(user_id)
+        if entry is not None:
+            hits.append((entry[0], phrase))
+    return hits
+
+
+def forget(chat_id):
+    _loaded.discard(chat_id)
+    return _games.pop(chat_id, None)
+
+
+lifecycle.register("phrases", forget)
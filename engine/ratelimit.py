@@ -0,0 +1,97 @@
+# ratelimit.py — token buckets for Telegram's send limits
+
+import asyncio
+import time
+
+GLOBAL_RATE = 30        # Telegram allows ~30 messages/sec across all chats
+PER_CHAT_RATE = 1       # ...and ~1 message/sec into any single chat
+PER_CHAT_BURST = 3      # short bursts into one chat are tolerated
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self):
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    async def take(self):
+        while not self.try_take():
+            await asyncio.sleep(self.wait_time())
+
+
+# One token bucket per key (user, chat...), created on first use and pruned once full again
+class Throttle:
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.refused = set()  # keys refused since they were last allowed; pruned with their buckets
+
+    def bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) > self.max_keys:
+                self.prune()
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def prune(self):
+        # A bucket that has refilled completely carries no state worth keeping
+        for key in [key for key, b in self.buckets.items() if b.wait_time() == 0 and b.tokens >= b.capacity]:
+            del self.buckets[key]
+            self.refused.discard(key)
+
+    def allow(self, key):
+        if self.bucket(key).try_take():
+            self.refused.discard(key)
+            return True
+        return False
+
+    # After allow() refused `key`: True only the first time since it was last allowed,
+    # e.g. to warn a flooding user once
+    def first_refusal(self, key):
+        if key in self.refused:
+            return False
+        self.refused.add(key)
+        return True
+
+
+class RateLimiter:
+    def __init__(self, global_rate=GLOBAL_RATE, chat_rate=PER_CHAT_RATE, chat_burst=PER_CHAT_BURST):
+        self.global_bucket = TokenBucket(global_rate)
+        self.chats = Throttle(chat_rate, chat_burst)
+
+    async def acquire(self, chat_id):
+        await self.chats.bucket(chat_id).take()
+        await self.global_bucket.take()
+
+    # Non-blocking per-chat check, for callers that park busy chats themselves
+    def try_chat(self, chat_id):
+        return self.chats.allow(chat_id)
+
+    def chat_ready_in(self, chat_id):
+        return self.chats.bucket(chat_id).wait_time()
+
+    async def acquire_global(self):
+        await self.global_bucket.take()
+
+
+limiter = RateLimiter()
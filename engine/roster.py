@@ -0,0 +1,78 @@
+# roster.py — debounced lobby roster edits
+
+import asyncio
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from storage import database as db
+from storage import index
+from engine import outbox, callbackdata, lifecycle
+
+DEBOUNCE = 1.5  # seconds; joins landing inside this window share one edit
+
+JOIN_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("Join", callback_data=callbackdata.encode("join"))]])
+
+_pending = {}       # chat_id -> scheduled edit task
+_last_text = {}     # chat_id -> (message_id, text currently shown)
+
+
+def render(chat_id):
+    players = db.get_player_list(chat_id)
+    player_text = "\n".join(f"- @{index.get_username(pid) or f'user{pid}'}" for pid in players)
+    return f"📜 Players Joined:\n{player_text}"
+
+
+# Call after every join/leave; the edit itself happens once the burst settles
+def schedule_update(bot, chat_id):
+    if chat_id in _pending:
+        return
+    _pending[chat_id] = asyncio.create_task(_edit_later(bot, chat_id))
+
+
+async def _edit_later(bot, chat_id):
+    await asyncio.sleep(DEBOUNCE)
+    _pending.pop(chat_id, None)
+    await _edit(bot, chat_id)
+
+
+# Push any pending roster change right now (e.g. before the game begins)
+async def flush(bot, chat_id):
+    task = _pending.pop(chat_id, None)
+    if task is None:
+        return
+    task.cancel()
+    await _edit(bot, chat_id)
+
+
+# Drops the game's pending edit and remembered text; returns what was dropped
+def forget(chat_id):
+    task = _pending.pop(chat_id, None)
+    if task is not None:
+        task.cancel()
+    return _last_text.pop(chat_id, None)
+
+
+async def _edit(bot, chat_id):
+    join_msg_id = db.get_game_message(chat_id)
+    if not join_msg_id:
+        return
+
+    text = render(chat_id)
+    if _last_text.get(chat_id) == (join_msg_id, text):
+        return
+    _last_text[chat_id] = (join_msg_id, text)
+
+    try:
+        await outbox.submit(
+            bot, "edit_message_text", outbox.LOBBY, merge_key=(chat_id, join_msg_id),
+            chat_id=chat_id,
+            message_id=join_msg_id,
+            text=text,
+            reply_markup=JOIN_MARKUP
+        )
+    except Exception as e:
+        if "not modified" in str(e).lower():
+            return
+        _last_text.pop(chat_id, None)
+        print(f"[WARN] Could not update player list message: {e}")
+
+
+lifecycle.register("roster", forget)
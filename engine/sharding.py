@@ -0,0 +1,154 @@
+# sharding.py — host games across worker processes, one slice of chats each
+#
+# The front process polls Telegram and forwards every update, as plain JSON,
+# to the worker that owns its game. Group updates go by chat id. DMs and
+# private-chat button presses go by the group the user last joined a game in
+# (/join or the Join button); other group traffic never moves a route. After a
+# front restart those routes are rebuilt from the shards' saved games. Each worker is a full
+# Application without an updater: its own db.games, timers, outbox and
+# optional SQLite file (AETHER_DB_PATH + ".<shard>"). Shard count must stay the
+# same across restarts, or restored games would land on the wrong worker.
+#
+#   sharding.run(token, configure, workers=4)
+#
+# `configure(application)` registers the bot's handlers; it must be a
+# module-level function so it can be handed to the worker processes.
+
+import asyncio
+import multiprocessing
+from telegram import Update
+from telegram.ext import ApplicationBuilder, ApplicationHandlerStop, TypeHandler
+from storage import persist
+from engine import outbox, ratelimit, timers, lifecycle, metrics, callbackdata
+
+MAX_TRACKED_USERS = 200_000  # user -> group routes kept by the front, oldest dropped first
+
+
+def shard_of(chat_id, workers):
+    return chat_id % workers
+
+
+class Router:
+    def __init__(self, workers):
+        self.workers = workers
+        self.user_chat = {}  # user_id -> group chat of their latest group activity
+
+    def route(self, data):
+        chat, private, user = _ids(data)
+        if chat is not None and not private:
+            if user is not None and _is_join(data):
+                self._learn(user, chat)
+            return shard_of(chat, self.workers)
+        key = self.user_chat.get(user, user if user is not None else chat)
+        return shard_of(key or 0, self.workers)
+
+    # Seeds user -> group routes from saved games, e.g. the shard stores after a restart
+    def restore(self, seats):
+        count = 0
+        for user, chat in seats:
+            self._learn(user, chat)
+            count += 1
+        return count
+
+    def _learn(self, user, chat):
+        routes = self.user_chat
+        if routes.get(user) != chat:
+            routes.pop(user, None)
+            routes[user] = chat
+            if len(routes) > MAX_TRACKED_USERS:
+                del routes[next(iter(routes))]
+
+
+# (chat id, private chat?, user id) from a raw update dict
+def _ids(data):
+    for kind in ("message", "edited_message", "channel_post", "my_chat_member", "chat_member", "chat_join_request"):
+        body = data.get(kind)
+        if body is not None:
+            chat = body.get("chat", {})
+            return chat.get("id"), chat.get("type") == "private", body.get("from", {}).get("id")
+
+    query = data.get("callback_query")
+    if query is not None:
+        chat = query.get("message", {}).get("chat", {})
+        return chat.get("id"), chat.get("type", "private") == "private", query.get("from", {}).get("id")
+
+    for body in data.values():
+        if isinstance(body, dict) and "from" in body:
+            return None, True, body["from"].get("id")
+    return None, True, None
+
+
+# A /join command or a Join button press: the only group updates that seat a player
+def _is_join(data):
+    message = data.get("message")
+    if message is not None:
+        words = (message.get("text") or "").split(maxsplit=1)
+        return bool(words) and words[0].split("@")[0] == "/join"
+    query = data.get("callback_query")
+    if query is not None:
+        decoded = callbackdata.decode(query.get("data") or "")
+        return decoded is not None and decoded[0] == "join"
+    return False
+
+
+# -- Worker --
+def _worker_main(shard, workers, token, configure, inbox):
+    asyncio.run(_serve(shard, workers, token, configure, inbox))
+
+
+async def _serve(shard, workers, token, configure, inbox):
+    # Telegram's global send budget is shared by every worker
+    outbox.limiter = ratelimit.RateLimiter(global_rate=ratelimit.GLOBAL_RATE / workers)
+    if persist.DB_PATH:
+        persist.open_store(f"{persist.DB_PATH}.{shard}")
+    if metrics.PORT:
+        await metrics.start(port=int(metrics.PORT) + 1 + shard)
+
+    application = metrics.with_api_counting(ApplicationBuilder().token(token).updater(None)).build()
+    configure(application)
+    loop = asyncio.get_running_loop()
+    async with application:
+        await application.start()
+        await timers.resume(application)
+        await lifecycle.start(application)
+        while True:
+            data = await loop.run_in_executor(None, inbox.get)
+            if data is None:
+                break
+            await application.update_queue.put(Update.de_json(data, application.bot))
+        await application.stop()
+    await persist.flush_async()
+
+
+# -- Front --
+def run(token, configure, workers=4):
+    ctx = multiprocessing.get_context("spawn")
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    processes = [
+        ctx.Process(target=_worker_main, args=(shard, workers, token, configure, inboxes[shard]), daemon=True)
+        for shard in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    router = Router(workers)
+    if persist.DB_PATH:
+        restored = router.restore(
+            seat for shard in range(workers) for seat in persist.read_seats(f"{persist.DB_PATH}.{shard}"))
+        print(f"[INFO] Restored {restored} player routes from saved games")
+
+    async def forward(update, context):
+        data = update.to_dict()
+        inboxes[router.route(data)].put(data)
+        raise ApplicationHandlerStop
+
+    front = ApplicationBuilder().token(token).build()
+    front.add_handler(TypeHandler(Update, forward), group=-1)
+    print(f"[INFO] Front dispatcher routing to {workers} workers")
+    try:
+        front.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        for inbox in inboxes:
+            inbox.put(None)
+        for process in processes:
+            process.join(timeout=10)
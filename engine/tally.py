@@ -0,0 +1,85 @@
+# tally.py — incremental per-game vote tally
+#
+# The day's tally is opened when the day phase starts and updated as each vote
+# arrives, with protected targets and vote-disabled voters already folded in.
+# tally_votes() then reads the counts instead of recounting, and the day can
+# close as soon as every eligible living player has voted.
+
+from collections import Counter
+from storage import database as db
+from engine import lifecycle
+
+_tallies = {}  # chat_id -> VoteTally
+
+
+class VoteTally:
+    __slots__ = ("eligible", "votes", "counted", "counts")
+
+    def __init__(self, eligible):
+        self.eligible = eligible    # living players whose vote will count
+        self.votes = {}             # voter -> target, as cast
+        self.counted = {}           # voter -> target the vote is counted against
+        self.counts = Counter()
+
+    def all_voted(self):
+        return bool(self.eligible) and self.eligible.issubset(self.votes)
+
+
+def open_round(chat_id, alive_players):
+    eligible = {uid for uid in alive_players if not db.is_vote_disabled(chat_id, uid)}
+    _tallies[chat_id] = VoteTally(eligible)
+
+
+# Returns True once every eligible voter has voted
+def record_vote(chat_id, voter_id, target_id):
+    tally = _tallies.get(chat_id)
+    if tally is None:
+        return False
+
+    previous = tally.counted.pop(voter_id, None)
+    if previous is not None:
+        tally.counts[previous] -= 1
+        if not tally.counts[previous]:
+            del tally.counts[previous]
+
+    tally.votes[voter_id] = target_id
+    if voter_id in tally.eligible and not db.is_player_protected(target_id):
+        tally.counted[voter_id] = target_id
+        tally.counts[target_id] += 1
+
+    return tally.all_voted()
+
+
+# A player died or fled mid-day: they stop counting as a voter, and votes cast
+# against them are withdrawn so those voters can vote again. Returns True if
+# everyone left has now voted.
+def drop_player(chat_id, user_id):
+    tally = _tallies.get(chat_id)
+    if tally is None:
+        return False
+    tally.eligible.discard(user_id)
+    for voter in [voter for voter, target in tally.votes.items() if voter == user_id or target == user_id]:
+        del tally.votes[voter]
+        target = tally.counted.pop(voter, None)
+        if target is not None:
+            tally.counts[target] -= 1
+            if not tally.counts[target]:
+                del tally.counts[target]
+    return tally.all_voted()
+
+
+def close(chat_id):
+    return _tallies.pop(chat_id, None)
+
+
+# Full recount, for when no live tally exists (e.g. the day began before a restart)
+def count_votes(chat_id, votes):
+    counts = Counter()
+    for voter, target in votes.items():
+        if db.is_player_protected(target): continue
+        if db.is_vote_disabled(chat_id, voter): continue
+        counts[target] += 1
+    return counts
+
+
+lifecycle.register("tally", close)
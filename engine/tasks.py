@@ -1,6 +1,8 @@
 # tasks.py (converted for Application API)
 
 from storage import database as db
+from storage import index
+from engine import win, phrases, lifecycle
 
 # 🔍 Show user their active tasks
 def get_user_tasks(user_id):
@@ -18,6 +20,7 @@ def submit_task(user_id, code):
     for task in tasks:
         if task.get('code') == code:
             db.complete_task(user_id, task)
+            win.touch(index.get_chat_id_by_user(user_id), user_id)
             return "✅ Task completed successfully!"
     return "❌ Invalid or expired task code."
 
@@ -45,3 +48,16 @@ def assign_task(user_id, description, code):
 
     tasks.append(new_task)
     db.set_tasks(user_id, tasks)  # ✅ Save the updated task list
+
+    if code in phrases.TASKS:
+        phrases.watch(index.get_chat_id_by_user(user_id), user_id, phrases.TASKS[code], code)
+
+
+# Teardown: a finished game's tasks go with it
+def _drop_tasks(user_id):
+    tasks = db.get_tasks(user_id)
+    if tasks:
+        db.set_tasks(user_id, [])
+    return tasks
+
+lifecycle.register("tasks", _drop_tasks, per_player=True)
@@ -0,0 +1,126 @@
+# timers.py — durable game deadlines
+#
+# Deadlines are stored as absolute timestamps inside the game state
+# (db.games[chat_id]["deadlines"]) so storage.persist writes them out with
+# everything else. After a restart, resume() reschedules what is still
+# pending and replays overdue transitions in deadline order, throttled so a
+# mass restart does not flood the Bot API.
+
+import time
+from storage import database as db
+from storage import persist
+from engine.timerwheel import TimerWheel
+
+CATCHUP_RATE = 5  # overdue transitions replayed per second after a restart
+
+_handlers = {}  # kind -> (async fn(context, chat_id, *args), replay when overdue?)
+_pending = {}   # chat_id -> {key: Timer}
+
+# One wheel for every game's deadlines, countdown alerts and effect expiries
+wheel = TimerWheel()
+
+
+def register(kind, fn, catch_up=True):
+    _handlers[kind] = (fn, catch_up)
+
+
+def _deadlines(chat_id):
+    return db.games[chat_id].setdefault("deadlines", {})
+
+
+# `key` names the slot (one deadline per key per game); `kind` picks the handler.
+# The context is kept so the handler runs with the same bot/application.
+def schedule(context, chat_id, key, kind, delay, *args):
+    _deadlines(chat_id)[key] = {"kind": kind, "at": time.time() + delay, "args": list(args)}
+    persist.checkpoint(chat_id)
+    _arm(context, chat_id, key, delay)
+
+
+# Returns True if a pending deadline (of `kind`, when given) was cancelled
+def cancel(chat_id, key, kind=None):
+    game = db.games.get(chat_id)
+    deadlines = game.get("deadlines", {}) if game is not None else {}
+    entry = deadlines.get(key)
+    if entry is None or (kind is not None and entry["kind"] != kind):
+        return False
+    del deadlines[key]
+    persist.mark_dirty(chat_id)
+    timer = _pending.get(chat_id, {}).pop(key, None)
+    if timer is not None:
+        wheel.cancel(timer)
+    return True
+
+
+def cancel_all(chat_id):
+    pending = _pending.pop(chat_id, {})
+    for timer in pending.values():
+        wheel.cancel(timer)
+    return pending
+
+
+def has_pending(chat_id):
+    return bool(_pending.get(chat_id))
+
+
+def _arm(context, chat_id, key, delay):
+    timers = _pending.setdefault(chat_id, {})
+    old = timers.get(key)
+    if old is not None:
+        wheel.cancel(old)
+    timers[key] = wheel.call_later(max(delay, 0), _fire, context, chat_id, key)
+    wheel.start()
+
+
+# Runs a pending deadline now instead of waiting for it (headless simulator, tests)
+async def fire_now(chat_id, key):
+    timer = _pending.get(chat_id, {}).get(key)
+    if timer is None or not wheel.cancel(timer):
+        return False
+    await timer.callback(*timer.args)
+    return True
+
+
+async def _fire(context, chat_id, key):
+    timers = _pending.get(chat_id)
+    if timers is not None:
+        timers.pop(key, None)
+        if not timers:
+            del _pending[chat_id]
+
+    game = db.games.get(chat_id)
+    if game is None:  # cancelled or finished
+        return
+    entry = game.get("deadlines", {}).pop(key, None)
+    if entry is None:
+        return
+    persist.mark_dirty(chat_id)
+
+    handler = _handlers.get(entry["kind"])
+    if handler is None:
+        print(f"[WARN] No timer handler for '{entry['kind']}' in {chat_id}")
+        return
+    await handler[0](context, chat_id, *entry["args"])
+
+
+# -- Restart --
+# Use as Application post_init: restores saved games, then their deadlines.
+async def resume(application):
+    persist.restore()
+    context = application.context_types.context(application)
+    now = time.time()
+
+    overdue = []
+    for chat_id, game in db.games.items():
+        for key, entry in list(game.get("deadlines", {}).items()):
+            if entry["at"] > now:
+                _arm(context, chat_id, key, entry["at"] - now)
+            elif _handlers.get(entry["kind"], (None, False))[1]:
+                overdue.append((entry["at"], chat_id, key))
+            else:
+                del game["deadlines"][key]  # stale countdown alerts and the like
+
+    overdue.sort()
+    for i, (_, chat_id, key) in enumerate(overdue):
+        _arm(context, chat_id, key, i / CATCHUP_RATE)
+    if overdue:
+        print(f"[INFO] Replaying {len(overdue)} overdue game transitions")
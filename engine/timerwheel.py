@@ -0,0 +1,125 @@
+# timerwheel.py — hierarchical timing wheel shared by every game
+#
+# Four levels of 64 slots. Level 0 holds timers due within 64 ticks, level 1
+# within 64², and so on; higher slots cascade down as the wheel turns.
+# Insert and cancel are O(1): each timer remembers the slot (an insertion-
+# ordered dict) it sits in. With the default 0.25s tick the wheel spans
+# ~48 days; anything further out parks in the top level and is re-placed
+# when its slot comes round.
+
+import asyncio
+import math
+import time
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+LEVELS = 4
+
+
+class Timer:
+    __slots__ = ("expires", "callback", "args", "bucket")
+
+    def __init__(self, expires, callback, args):
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.bucket = None
+
+    @property
+    def active(self):
+        return self.bucket is not None
+
+
+class TimerWheel:
+    def __init__(self, tick=0.25, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.now_tick = int(clock() / tick)
+        self.wheel = [[{} for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self.count = 0
+        self._task = None
+
+    def __len__(self):
+        return self.count
+
+    # -- Insert / cancel --
+    def call_later(self, delay, callback, *args):
+        expires = math.ceil((self.clock() + delay) / self.tick)
+        timer = Timer(max(expires, self.now_tick + 1), callback, args)
+        self._place(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer):
+        if timer.bucket is None:
+            return False
+        del timer.bucket[timer]
+        timer.bucket = None
+        self.count -= 1
+        return True
+
+    def _place(self, timer):
+        delta = timer.expires - self.now_tick
+        level = 0
+        while level < LEVELS - 1 and delta >= 1 << (SLOT_BITS * (level + 1)):
+            level += 1
+        bucket = self.wheel[level][(max(timer.expires, self.now_tick) >> (SLOT_BITS * level)) & SLOT_MASK]
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    # -- Turning --
+    def _step(self):
+        self.now_tick += 1
+        tick = self.now_tick
+        for level in range(1, LEVELS):
+            if tick & ((1 << (SLOT_BITS * level)) - 1):
+                break
+            slots = self.wheel[level]
+            idx = (tick >> (SLOT_BITS * level)) & SLOT_MASK
+            bucket, slots[idx] = slots[idx], {}
+            for timer in bucket:
+                self._place(timer)
+
+        slots = self.wheel[0]
+        idx = tick & SLOT_MASK
+        due, slots[idx] = slots[idx], {}
+        for timer in due:
+            timer.bucket = None
+        self.count -= len(due)
+        return due
+
+    # Fires everything due up to `now`; returns the callbacks' results in order
+    def advance(self, now=None):
+        target = int((self.clock() if now is None else now) / self.tick)
+        results = []
+        while self.now_tick < target:
+            if not self.count:
+                self.now_tick = target
+                break
+            for timer in self._step():
+                try:
+                    results.append(timer.callback(*timer.args))
+                except Exception as e:  # one bad callback must not drop the rest of the slot
+                    print(f"[WARN] Timer callback failed: {e}")
+        return results
+
+    # -- Background ticker --
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            for result in self.advance():
+                if asyncio.iscoroutine(result):
+                    asyncio.get_running_loop().create_task(_guard(result))
+
+
+async def _guard(coro):
+    try:
+        await coro
+    except Exception as e:
+        print(f"[WARN] Timer callback failed: {e}")
@@ -1,41 +1,137 @@
 # win.py (converted for Application API)
 
 from storage import database as db
+from storage import index
+from storage.records import intern_role
+from engine import catalog, lifecycle
 
-def check_for_winner(chat_id):
-    players = db.get_alive_players(chat_id)
+# --- Role Win Checks (named by "win.check" in roles.json) ---
+def final_three(chat_id, pid, players):
+    return len(players) <= 3
+
+def relic_hoard(chat_id, pid, players):
+    return db.get_relic_count(pid) >= 3
+
+def thread_control(chat_id, pid, players):
+    return db.used_thread(pid)
+
+def nexus_control(chat_id, pid, players):
+    if db.check_nexus_control(pid):
+        db.set_nexus_winner(pid)
+        return True
+    return False
+
+
+# --- Incremental State ---
+# Alive players, their roles and factions, faction head-counts, and which
+# players already satisfy a cached role win are kept per game and updated
+# as kills, swaps, curses and item changes happen, so check_for_winner never
+# rescans the table. Callers report changes with on_kill / touch / rebuild.
+
+class WinState:
+    __slots__ = ("roles", "factions", "faction_counts", "holders", "ready", "seats")
+
+    def __init__(self):
+        self.seats = {}             # pid -> seating position; ties between holders go to the earliest seat
+        self.roles = {}             # alive pid -> role_id (insertion = seating order)
+        self.factions = {}          # alive pid -> faction
+        self.faction_counts = {}    # faction -> alive head-count
+        self.holders = {}           # role_id -> {pid: None}, alive holders
+        self.ready = {}             # role_id -> {pid: None}, holders meeting a cached win
+
+_states = {}
+
+
+def _add(chat_id, state, pid):
+    role_id = intern_role(db.get_user_role(pid))
+    faction = db.get_player_faction(pid)
+    state.roles[pid] = role_id
+    state.factions[pid] = faction
+    state.faction_counts[faction] = state.faction_counts.get(faction, 0) + 1
+    state.holders.setdefault(role_id, {})[pid] = None
+
+    spec = catalog.ROLES[role_id]
+    if spec and spec.win and spec.win.cached and WIN_CHECKS[role_id](chat_id, pid, state.roles):
+        state.ready.setdefault(role_id, {})[pid] = None
+
+
+def _remove(state, pid):
+    role_id = state.roles.pop(pid, None)
+    if role_id is None:
+        return
+    faction = state.factions.pop(pid)
+    state.faction_counts[faction] -= 1
+    if not state.faction_counts[faction]:
+        del state.faction_counts[faction]
+    state.holders[role_id].pop(pid, None)
+    state.ready.get(role_id, {}).pop(pid, None)
 
-    if not players:
-        return "💀 Everyone perished. The void claims Aether."
 
-    factions = [db.get_player_faction(pid) for pid in players]
-    roles = {pid: db.get_user_role(pid) for pid in players}
-    unique_factions = set(factions)
+def rebuild(chat_id):
+    state = _states[chat_id] = WinState()
+    for seat, pid in enumerate(db.get_alive_players(chat_id)):
+        state.seats[pid] = seat
+        _add(chat_id, state, pid)
+    return state
 
-    # 🟣 1. GOAT WIN — Survive till final 3
-    for pid in players:
-        if roles[pid] == "Goat" and len(players) <= 3:
-            return f"🐐 @{db.get_username(pid)} (Goat) wins by surviving until the Final 3!"
 
-    # 🟡 2. ARCHIVIST RELIC WIN
-    for pid in players:
-        if roles[pid] == "Archivist" and db.get_relic_count(pid) >= 3:
-            return f"📚 @{db.get_username(pid)} (Archivist) wins by collecting 3 relics!"
+# touch() re-adds players, so holder dicts are not in seating order
+def _by_seat(state, pids):
+    return sorted(pids, key=state.seats.__getitem__) if len(pids) > 1 else pids
 
-    # 🧵 3. PUPPETMASTER THREAD WIN
-    for pid in players:
-        if roles[pid] == "Puppetmaster" and db.used_thread(pid):
-            return f"🧵 @{db.get_username(pid)} (Puppetmaster) wins via total mind control!"
 
-    # ⚙️ 4. NEXUS WIN CONDITION
-    for pid in players:
-        if roles[pid] == "Ascended" and db.check_nexus_control(pid):
-            db.set_nexus_winner(pid)
-            return f"⚙️ Nexus Manipulation! @{db.get_username(pid)} (Ascended) triggers Core Hijack Victory!"
+# A living player's role, faction or inventory changed
+def touch(chat_id, *pids):
+    state = _states.get(chat_id)
+    if state is None:
+        return
+    for pid in pids:
+        if pid in state.roles:
+            _remove(state, pid)
+            _add(chat_id, state, pid)
+
+
+# Task rewards and trades can hand out relics; re-check only cached role wins
+def refresh_rewards(chat_id):
+    state = _states.get(chat_id)
+    if state is None:
+        return
+    for win in catalog.WIN_ORDER:
+        if win.cached:
+            touch(chat_id, *state.holders.get(win.role_id, ()))
+
+
+def on_kill(chat_id, pid):
+    state = _states.get(chat_id)
+    if state is not None:
+        _remove(state, pid)
+
+
+def forget(chat_id):
+    return _states.pop(chat_id, None)
+
+
+def check_for_winner(chat_id):
+    state = _states.get(chat_id) or rebuild(chat_id)
+    players = state.roles
+
+    if not players:
+        return "💀 Everyone perished. The void claims Aether."
+
+    # 🐐📚🧵⚙️ 1-4. ROLE WINS — Goat, Archivist, Puppetmaster, Ascended, in roles.json order
+    for win in catalog.WIN_ORDER:
+        if win.cached:
+            for pid in _by_seat(state, state.ready.get(win.role_id, ())):
+                return win.message.format(username=index.get_username(pid))
+            continue
+        check = WIN_CHECKS[win.role_id]
+        for pid in _by_seat(state, state.holders.get(win.role_id, ())):
+            if check(chat_id, pid, players):
+                return win.message.format(username=index.get_username(pid))
 
     # 🏆 5. FACTIONAL WIN
-    if len(unique_factions) == 1:
-        faction = unique_factions.pop()
+    if len(state.faction_counts) == 1:
+        faction = next(iter(state.faction_counts))
         return f"🏆 {faction} claims the world of Aether. All others perished!"
 
     # 🌌 6. FINAL ECHO OUTCOME
@@ -45,7 +141,7 @@ def check_for_winner(chat_id):
         if dominant_echo == "destroy_the_core":
             top_betrayer = db.get_top_betrayer(chat_id)
             if top_betrayer:
-                return f"💥 Chaos wins! @{db.get_username(top_betrayer)} becomes the *True Echo of Destruction*."
+                return f"💥 Chaos wins! @{index.get_username(top_betrayer)} becomes the *True Echo of Destruction*."
             return "💥 Chaos reigns. The world is destroyed. No victors remain."
 
         elif dominant_echo == "save_the_core":
@@ -54,9 +150,14 @@ def check_for_winner(chat_id):
         elif dominant_echo == "escape_the_core":
             escapers = db.get_escapees(chat_id)
             if escapers:
-                names = ", ".join(f"@{db.get_username(uid)}" for uid in escapers)
+                names = ", ".join(f"@{index.get_username(uid)}" for uid in escapers)
                 return f"🚀 Escapees: {names} survived the collapse!"
             return "🚀 A few managed to escape. Aether's future is... unknown."
 
     # ❌ 7. No Winner Yet
     return None
+
+
+# role_id -> win check, bound once from roles.json
+WIN_CHECKS = catalog.bind(globals(), "win")
+lifecycle.register("win", forget)
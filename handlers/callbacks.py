@@ -1,109 +1,179 @@
 # callbacks.py (converted for Application API)
 
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram import Update
 from telegram.ext import ContextTypes
 from storage import database as db
-from engine import tasks, win
+from storage import index
+from storage import persist
+from engine import tasks, win, outbox, roster, keyboards, tally, phases, metrics, callbackdata, lifecycle
 from engine.roles import use_power
 from engine.inventory import use_item
 
+# action -> async fn(query, context, user_id, chat_id, *fields); see engine/callbackdata.py
+ROUTES = {}
+
+
+def route(action):
+    def register(fn):
+        ROUTES[action] = fn
+        return fn
+    return register
+
+
+@metrics.instrumented("callback", metrics.callback_branch)
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    data = query.data
-    user_id = query.from_user.id
-    chat_id = query.message.chat_id
+    decoded = callbackdata.decode(query.data)
+    handler = ROUTES.get(decoded[0]) if decoded else None
+    if handler is None:
+        _answer(context, query, "⚠️ This button has expired.")
+        return
+    await handler(query, context, query.from_user.id, query.message.chat_id, *decoded[1])
+
+
+# Button replies are queued on the outbox like every other Bot API call, so
+# they get its flood-control backoff and never abort a handler mid-way
+def _answer(context, query, text=None):
+    return outbox.post(context.bot, "answer_callback_query", outbox.VOTE, callback_query_id=query.id, text=text)
+
+
+def _edit(context, query, text=None, reply_markup=None, **kwargs):
+    message = query.message
+    method = "edit_message_text" if text is not None else "edit_message_reply_markup"
+    if text is not None:
+        kwargs["text"] = text
+    return outbox.post(
+        context.bot, method, outbox.VOTE, merge_key=(method, message.chat_id, message.message_id),
+        chat_id=message.chat_id, message_id=message.message_id, reply_markup=reply_markup, **kwargs
+    )
+
+
+# Buttons pressed in a private chat (chat id == user id) act on the player's game group
+def _game_chat(user_id, chat_id):
+    if chat_id == user_id:
+        return index.get_chat_id_by_user(user_id) or chat_id
+    return chat_id
+
+
+@route("join")
+async def on_join(query, context, user_id, chat_id):
     username = query.from_user.username or query.from_user.full_name or f"user{user_id}"
+    success = index.add_player(chat_id, user_id, query.from_user.full_name)
+    index.set_username(chat_id, user_id, username)
+
+    if success:
+        lifecycle.touch(chat_id)
+        roster.schedule_update(context.bot, chat_id)
+        _answer(context, query, "You joined the match!")
+    else:
+        _answer(context, query, "Already in the game.")
+
+
+@route("vote")
+async def on_vote(query, context, user_id, chat_id, target_id):
+    if user_id == target_id:
+        _answer(context, query, "❌ You cannot vote for yourself.")
+        return
+
+    game_chat = _game_chat(user_id, chat_id)
+    if not db.cast_vote(game_chat, user_id, target_id):
+        _answer(context, query, "⚠️ Voting failed.")
+        return
+
+    # The vote and the early close stand whatever happens to the replies below
+    persist.mark_dirty(game_chat)
+    lifecycle.touch(game_chat)
+    all_voted = tally.record_vote(game_chat, user_id, target_id)
+
+    _answer(context, query, "✅ Your vote has been recorded.")
+    _edit(context, query, "🗳️ Vote submitted.")
+
+    voter_name = index.get_username(user_id) or query.from_user.full_name or f"user{user_id}"
+    target_name = index.get_username(target_id) or f"user{target_id}"
+    outbox.post(
+        context.bot, "send_message", outbox.VOTE,
+        chat_id=game_chat,
+        text=f"🗳️ *{voter_name}* has voted to eliminate *{target_name}*.",
+        parse_mode='Markdown'
+    )
+
+    if all_voted:
+        await phases.close_day_early(context, game_chat)
+
+
+@route("task_complete")
+async def on_task_complete(query, context, user_id, chat_id, code):
+    result = tasks.submit_task(user_id, code)
+    _answer(context, query, result)
+
+
+@route("task_abandon")
+async def on_task_abandon(query, context, user_id, chat_id):
+    result = tasks.abandon_task(user_id)
+    _answer(context, query, result)
+
+
+@route("check_win")
+async def on_check_win(query, context, user_id, chat_id):
+    winner = win.check_for_winner(chat_id)
+    if winner:
+        _edit(context, query, f"🏆 *Game Over! Winner:* {winner}", parse_mode="Markdown")
+    else:
+        _answer(context, query, "No winner yet.")
+
+
+@route("usepower")
+async def on_usepower(query, context, user_id, chat_id, target_id):
+    if user_id == target_id:
+        _answer(context, query, "❌ You cannot use your power on yourself.")
+        return
+
+    target_username = index.get_username(target_id) or f"user{target_id}"
+    result = use_power(user_id, target_username)
+
+    # Night bookkeeping first, so a failed reply cannot keep the night open
+    if not result.startswith("❌"):
+        game_chat = index.get_chat_id_by_user(user_id)
+        lifecycle.touch(game_chat)
+        await phases.power_used(context, game_chat, user_id)
+
+    _answer(context, query, "Power used")
+    _edit(context, query, result)
+
+
+@route("useitem")
+async def on_useitem(query, context, user_id, chat_id, item):
+    result = use_item(user_id, item)
+    _answer(context, query)
+    _edit(context, query, f"{result}")
+
+
+@route("echo_vote")
+async def on_echo_vote(query, context, user_id, chat_id, choice):
+    if choice not in phases.ECHO_OPTIONS:
+        _answer(context, query, "⚠️ Unknown choice.")
+        return
+    db.set_echo_vote(_game_chat(user_id, chat_id), user_id, choice)
+    label = phases.ECHO_OPTIONS[choice]
+    _answer(context, query, f"✅ You chose: {label}")
+    _edit(context, query, f"You voted for *{label}*", parse_mode="Markdown")
+
+
+@route("page")
+async def on_page(query, context, user_id, chat_id, code, page):
+    kind = keyboards.CODE_KINDS.get(code)
+    # Private chats share the user's id; the pages belong to their game's group
+    game_chat = index.get_chat_id_by_user(user_id) if chat_id == user_id else chat_id
+    if not kind or not game_chat:
+        _answer(context, query, "⚠️ This menu has expired.")
+        return
 
-    if data == "join":
-        success = db.add_player(chat_id, user_id, query.from_user.full_name)
-        db.set_username(chat_id, user_id, username)
-
-        if success:
-            players = db.get_player_list(chat_id)
-            player_text = "\n".join(
-                f"- @{db.get_username(pid) or f'user{pid}'}"
-                for pid in players
-            )
-
-            join_msg_id = db.get_game_message(chat_id)
-            if join_msg_id:
-                markup = InlineKeyboardMarkup([[InlineKeyboardButton("Join", callback_data="join")]])
-                try:
-                    await context.bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=join_msg_id,
-                        text=f"📜 Players Joined:\n{player_text}",
-                        reply_markup=markup,
-                        parse_mode='Markdown'
-                    )
-                except Exception as e:
-                    print(f"[WARN] Could not update player list message: {e}")
-
-            await query.answer("You joined the match!")
-        else:
-            await query.answer("Already in the game.")
-
-    elif data.startswith("vote_"):
-        target_id = int(data.split("_")[1])
-
-        if user_id == target_id:
-            await query.answer("❌ You cannot vote for yourself.")
-            return
-
-        if db.cast_vote(chat_id, user_id, target_id):
-            await query.answer("✅ Your vote has been recorded.")
-            await query.edit_message_text("🗳️ Vote submitted.")
-
-            try:
-                voter_name = db.get_username(user_id) or query.from_user.full_name or f"user{user_id}"
-                target_name = db.get_username(target_id) or f"user{target_id}"
-
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=f"🗳️ *{voter_name}* has voted to eliminate *{target_name}*.",
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                print(f"[WARN] Vote announcement failed: {e}")
-        else:
-            await query.answer("⚠️ Voting failed.")
-
-    elif data.startswith("task_complete_"):
-        code = data.split("_")[-1]
-        result = tasks.submit_task(user_id, code)
-        await query.answer(result)
-
-    elif data.startswith("task_abandon_"):
-        result = tasks.abandon_task(user_id)
-        await query.answer(result)
-
-    elif data == "check_win":
-        winner = win.check_for_winner(chat_id)
-        if winner:
-            await query.edit_message_text(f"🏆 *Game Over! Winner:* {winner}", parse_mode="Markdown")
-        else:
-            await query.answer("No winner yet.")
-
-    elif data.startswith("usepower_"):
-        target_id = int(data.split("_")[1])
-        target_username = db.get_username(target_id) or f"user{target_id}"
-        result = use_power(user_id, target_username)
-        await query.answer("Power used")
-        await query.edit_message_text(result)
-
-    elif data.startswith("useitem_"):
-        item = data.split("_", 1)[1]
-        result = use_item(user_id, item)
-        await query.answer()
-        await query.edit_message_text(f"{result}")
-
-    elif data.startswith("echo_vote_"):
-        choice = data.split("_")[-1]
-        db.set_echo_vote(chat_id, user_id, choice)
-        await query.answer(f"✅ You chose: {choice}")
-        await query.edit_message_text(f"You voted for *{choice}*", parse_mode="Markdown")
-
-    elif data.startswith("whisper_"):
-        target_id = int(data.split("_")[1])
-        db.enable_whisper(chat_id, user_id, target_id)
-        await query.answer("✅ Whisper enabled.")
+    markup = keyboards.target_keyboard(game_chat, kind, db.get_alive_players(game_chat), page)
+    _answer(context, query)
+    _edit(context, query, reply_markup=markup)
+
+
+@route("whisper")
+async def on_whisper(query, context, user_id, chat_id, target_id):
+    db.enable_whisper(chat_id, user_id, target_id)
+    _answer(context, query, "✅ Whisper enabled.")
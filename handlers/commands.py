@@ -5,12 +5,14 @@ from functools import partial
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from storage import database as db
-from engine import phases
+from storage import index
+from engine import phases, outbox, roster, keyboards, timers, metrics, callbackdata, lifecycle
 from config import BOT_OWNER_ID
 from storage import authorized
 from engine.animation import dark_fantasy_animation
 
 # ----- START -----
+@metrics.instrumented("command")
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         "👋 Welcome to *Echoes of Aether: The Silent War.*\n\n"
@@ -19,6 +21,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 # ----- START GAME -----
+@metrics.instrumented("command")
 async def start_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
@@ -32,46 +35,45 @@ async def start_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     db.set_game_start_time(chat_id, int(time.time()) + countdown)
 
     # Schedule game to begin after countdown
-    async def begin_game_callback(context: ContextTypes.DEFAULT_TYPE):
-        await phases.begin_game(context, chat_id)
-
-    context.job_queue.run_once(begin_game_callback, countdown)
+    timers.schedule(context, chat_id, "begin", "begin_game", countdown)
 
     # Countdown alerts
-    def countdown_alert(seconds_left):
-        async def alert_fn(context: ContextTypes.DEFAULT_TYPE):
-            emoji = "⏳" if seconds_left > 5 else "🚨"
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=f"{emoji} *{seconds_left} seconds left before the game begins!*",
-                parse_mode='Markdown'
-            )
-        return alert_fn
-
-    if countdown >= 30:
-        context.job_queue.run_once(countdown_alert(30), countdown - 30)
-    if countdown >= 10:
-        context.job_queue.run_once(countdown_alert(10), countdown - 10)
-    if countdown >= 5:
-        context.job_queue.run_once(countdown_alert(5), countdown - 5)
+    for seconds_left in (30, 10, 5):
+        if countdown >= seconds_left:
+            timers.schedule(context, chat_id, f"alert_{seconds_left}", "countdown", countdown - seconds_left, seconds_left)
 
     # Join buttons
-    join_btn = [[InlineKeyboardButton("🔹 Join Game", callback_data="join")]]
-    await context.bot.send_message(
+    join_btn = [[InlineKeyboardButton("🔹 Join Game", callback_data=callbackdata.encode("join"))]]
+    await outbox.submit(
+        context.bot, "send_message", outbox.LOBBY,
         chat_id=chat_id,
         text="🧩 *Echoes of Aether Begins!*\nClick below to join the match!",
         reply_markup=InlineKeyboardMarkup(join_btn),
         parse_mode='Markdown'
     )
 
-    player_msg = await context.bot.send_message(
+    player_msg = await outbox.submit(
+        context.bot, "send_message", outbox.LOBBY,
         chat_id=chat_id,
         text="📜 *Players Joined:*\n_(Waiting...)_",
         parse_mode='Markdown'
     )
     db.set_game_message(chat_id, player_msg.message_id)
 
+@metrics.timed("timer", "countdown")
+async def countdown_alert(context: ContextTypes.DEFAULT_TYPE, chat_id: int, seconds_left: int):
+    emoji = "⏳" if seconds_left > 5 else "🚨"
+    await outbox.submit(
+        context.bot, "send_message", outbox.PHASE,
+        chat_id=chat_id,
+        text=f"{emoji} *{seconds_left} seconds left before the game begins!*",
+        parse_mode='Markdown'
+    )
+
+timers.register("countdown", countdown_alert, catch_up=False)
+
 # ----- JOIN GAME -----
+@metrics.instrumented("command")
 async def join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     user = update.effective_user
@@ -81,30 +83,17 @@ async def join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     username = user.username or user.full_name or f"user{user.id}"
-    success = db.add_player(chat_id, user.id, user.full_name)
-    db.set_username(chat_id, user.id, username)
+    success = index.add_player(chat_id, user.id, user.full_name)
+    index.set_username(chat_id, user.id, username)
 
     if not success:
         await update.message.reply_text("ℹ️ You're already in the game.")
         return
 
-    players = db.get_player_list(chat_id)
-    player_text = "\n".join(f"- @{db.get_username(pid) or f'user{pid}'}" for pid in players)
-
-    join_msg_id = db.get_game_message(chat_id)
-    if join_msg_id:
-        markup = InlineKeyboardMarkup([[InlineKeyboardButton("Join", callback_data="join")]])
-        try:
-            await context.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=join_msg_id,
-                text=f"📜 Players Joined:\n{player_text}",
-                reply_markup=markup
-            )
-        except Exception as e:
-            print(f"[WARN] Could not update player list message: {e}")
+    roster.schedule_update(context.bot, chat_id)
 
 # ----- EXTEND TIME -----
+@metrics.instrumented("command")
 async def extend_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
@@ -116,6 +105,7 @@ async def extend_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("⏳ Extra time added! Waiting for more players...")
 
 # ----- FLEE -----
+@metrics.instrumented("command")
 async def flee(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     user = update.effective_user
@@ -124,30 +114,32 @@ async def flee(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ There's no game to flee from.")
         return
 
-    if db.remove_player(chat_id, user.id):
+    if index.remove_player(chat_id, user.id):
+        if not db.has_game_started(chat_id):
+            roster.schedule_update(context.bot, chat_id)
         await update.message.reply_text(f"🚪 {user.full_name} has left the game.")
+        await phases.player_left(context, chat_id, user.id)
     else:
         await update.message.reply_text("You’re not part of the game.")
 
 # ----- VOTE -----
+@metrics.instrumented("command")
 async def vote(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     if not db.is_game_active(chat_id):
         await update.message.reply_text("No game in progress.")
         return
 
-    players = db.get_player_list(chat_id)
+    players = db.get_alive_players(chat_id)
     if not players:
         await update.message.reply_text("No players found.")
         return
 
-    buttons = [
-        [InlineKeyboardButton(name, callback_data=f"vote_{pid}")]
-        for pid, name in players.items()
-    ]
-    await update.message.reply_text("🔍 *Vote for a suspect:*", reply_markup=InlineKeyboardMarkup(buttons), parse_mode='Markdown')
+    markup = keyboards.target_keyboard(chat_id, "vote", players)
+    await update.message.reply_text("🔍 *Vote for a suspect:*", reply_markup=markup, parse_mode='Markdown')
 
 # ----- FORCE START -----
+@metrics.instrumented("command")
 async def force_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
@@ -167,10 +159,12 @@ async def force_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await phases.begin_game(context, chat_id)
 
 # ----- CHAT ID -----
+@metrics.instrumented("command")
 async def get_chat_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(f"Chat ID: `{update.effective_chat.id}`", parse_mode='Markdown')
 
 # ----- AUTHORIZE GROUP -----
+@metrics.instrumented("command")
 async def authorize(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != BOT_OWNER_ID:
         await update.message.reply_text("🚫 You are not authorized to do this.")
@@ -183,6 +177,7 @@ async def authorize(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("ℹ️ This group is already authorized.")
 
 # ----- DEAUTHORIZE GROUP -----
+@metrics.instrumented("command")
 async def deauthorize(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != BOT_OWNER_ID:
         await update.message.reply_text("🚫 You are not authorized to do this.")
@@ -195,6 +190,7 @@ async def deauthorize(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("ℹ️ This group wasn't authorized.")
 
 # ----- CANCEL GAME -----
+@metrics.instrumented("command")
 async def cancel_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
@@ -202,7 +198,7 @@ async def cancel_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ There’s no active game to cancel.")
         return
 
-    db.cancel_game(chat_id)
+    lifecycle.end_game(chat_id, "cancelled")
 
     await update.message.reply_text("🚫 *The game has been cancelled.* Watch closely...", parse_mode='Markdown')
 
@@ -3,11 +3,33 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from storage import database as db
+from storage import index
 from engine.roles import use_power
 from engine.inventory import use_item
+from engine.ratelimit import Throttle
+from engine import outbox, phases, win, metrics, callbackdata
 
+DM_RATE = 0.5   # commands per second a player can sustain in private chat
+DM_BURST = 5    # ...after a short burst
+
+# "/command" -> (async fn(update, context, user_id, args, reply), args needed, usage)
+COMMANDS = {}
+
+_throttle = Throttle(DM_RATE, DM_BURST)
+
+
+# `args`: how many words the command needs; `rest=True` passes everything after
+# the command as one argument instead of splitting it into words
+def command(name, args=0, usage=None, rest=False):
+    def register(fn):
+        COMMANDS[name] = (fn, args, usage, rest)
+        return fn
+    return register
+
+
+@metrics.instrumented("dm", metrics.command_branch)
 async def handle_dm(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message:
+    if not update.message or not update.message.text:
         return
 
     text = update.message.text
@@ -18,160 +40,19 @@ async def handle_dm(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if update.message:
                 await update.message.reply_text(msg)
             else:
-                await context.bot.send_message(chat_id=update.effective_chat.id, text=msg)
+                await outbox.submit(context.bot, "send_message", outbox.NOTICE, chat_id=update.effective_chat.id, text=msg)
         except Exception as e:
             print(f"[WARN] Failed to reply: {e}")
 
-    if text.startswith("/usepower"):
-        parts = text.split()
-        if len(parts) < 2:
-            await safe_reply("Usage: /usepower @username")
-        else:
-            result = use_power(user_id, parts[1])
-            await safe_reply(result)
-
-    elif text.startswith("/useitem"):
-        parts = text.split()
-        if len(parts) < 2:
-            await safe_reply("Usage: /useitem item_name")
-        else:
-            result = use_item(user_id, parts[1])
-            await safe_reply(result)
-
-    elif text == "/mytasks":
-        task = db.get_current_task(user_id)
-        if task:
-            desc = task.get("desc") or task.get("description") or str(task)
-            await safe_reply(f"🧾 Your task: {desc}")
-        else:
-            await safe_reply("You have no active task.")
-
-    elif text.startswith("/complete_task"):
-        parts = text.split()
-        if len(parts) < 2:
-            await safe_reply("Usage: /complete_task CODE")
-        else:
-            result = db.complete_task(user_id, parts[1])
-            await safe_reply(result)
-
-    elif text == "/abandon_task":
-        result = db.abandon_current_task(user_id)
-        await safe_reply(result)
-
-    elif text.startswith("/ally"):
-        parts = text.split()
-        if len(parts) < 2:
-            await safe_reply("Usage: /ally @username")
-        else:
-            target_username = parts[1].replace("@", "")
-            target_id = db.get_user_id_by_name(target_username)
-            if not target_id:
-                await safe_reply("User not found.")
-            else:
-                await context.bot.send_message(
-                    chat_id=target_id,
-                    text=f"{update.effective_user.username} has proposed a secret alliance! Reply with /accept @{update.effective_user.username} to accept.",
-                )
-                await safe_reply("Alliance request sent privately.")
-
-    elif text.startswith("/accept"):
-        parts = text.split()
-        if len(parts) < 2:
-            await safe_reply("Usage: /accept @username")
-        else:
-            target_username = parts[1].replace("@", "")
-            target_id = db.get_user_id_by_name(target_username)
-            if not target_id:
-                await safe_reply("User not found.")
-            else:
-                db.add_alliance(update.effective_chat.id, update.effective_user.id, target_id)
-                await safe_reply("Alliance formed.")
-                try:
-                    await context.bot.send_message(
-                        chat_id=target_id,
-                        text=f"{update.effective_user.username} accepted your alliance. You are now linked.",
-                    )
-                except Exception:
-                    pass
-
-    elif text.startswith("/alliance"):
-        parts = text.split(maxsplit=1)
-        if len(parts) < 2:
-            await safe_reply("Usage: /alliance <your message>")
-        else:
-            db.send_alliance_group_message(update.effective_chat.id, user_id, parts[1], context)
-            await safe_reply("📨 Message sent to your alliance.")
-
-    elif text == "/myallies":
-        chat_id = update.effective_chat.id
-        allies = db.get_allies(chat_id, update.effective_user.id)
-        if not allies:
-            await safe_reply("You have no allies yet.")
-        else:
-            names = [db.get_username(uid) for uid in allies]
-            await safe_reply("Your Allies:\n" + "\n".join(f"- {name}" for name in names))
-
-    elif text.startswith("/offer"):
-        parts = text.split()
-        if len(parts) < 3:
-            await safe_reply("Usage: /offer @username item_name")
-        else:
-            target_username = parts[1].replace("@", "")
-            item_name = parts[2]
-            target_id = db.get_user_id_by_name(target_username)
-
-            if not target_id:
-                await safe_reply("Target not found.")
-            elif item_name not in db.get_inventory(user_id):
-                await safe_reply("You don't have that item.")
-            else:
-                if db.offer_item(update.effective_chat.id, user_id, target_id, item_name):
-                    await safe_reply("Offer sent.")
-                    await context.bot.send_message(
-                        chat_id=target_id,
-                        text=f"{update.effective_user.username} offered you '{item_name}'. Use /accept_trade @{update.effective_user.username} to accept."
-                    )
-                else:
-                    await safe_reply("You already have a pending offer with this user.")
-
-    elif text.startswith("/accept_trade"):
-        parts = text.split()
-        if len(parts) < 2:
-            await safe_reply("Usage: /accept_trade @username")
-        else:
-            from_username = parts[1].replace("@", "")
-            from_id = db.get_user_id_by_name(from_username)
-            if not from_id:
-                await safe_reply("Offer not found.")
-            else:
-                item = db.accept_offer(update.effective_chat.id, from_id, user_id)
-                if item:
-                    await safe_reply(f"You received '{item}' from @{from_username}.")
-                    await context.bot.send_message(
-                        chat_id=from_id,
-                        text=f"{update.effective_user.username} accepted your trade. '{item}' transferred."
-                    )
-                else:
-                    await safe_reply("No valid offer found.")
-
-    elif text == "/myitems":
-        inv = db.get_inventory(user_id)
-        if not inv:
-            await safe_reply("🎒 Your inventory is empty.")
-        else:
-            buttons = [
-                [InlineKeyboardButton(f"Use: {item} ({qty})", callback_data=f"useitem_{item}")]
-                for item, qty in inv.items()
-            ]
-
-            await context.bot.send_message(
-                chat_id=user_id,
-                text="🧰 *Your Items:*",
-                parse_mode="Markdown",
-                reply_markup=InlineKeyboardMarkup(buttons)
-            )
+    # Floods stop here, before any storage lookup or outbound DM
+    if not _throttle.allow(user_id):
+        if _throttle.first_refusal(user_id):
+            await safe_reply("⏳ Slow down — too many commands. Try again in a few seconds.")
+        return
 
-    else:
+    token, _, tail = text.partition(" ")
+    entry = COMMANDS.get(token.split("@", 1)[0])
+    if entry is None:
         await safe_reply(
             "Unknown command. Try:\n"
             "• /mytasks\n"
@@ -179,4 +60,163 @@ async def handle_dm(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "• /abandon_task\n"
             "• /usepower @user\n"
             "• /useitem item_name"
-                  )
+        )
+        return
+
+    fn, needed, usage, rest = entry
+    tail = tail.strip()
+    args = ([tail] if tail else []) if rest else tail.split()
+    if len(args) < needed:
+        await safe_reply(usage)
+        return
+    await fn(update, context, user_id, args, safe_reply)
+
+
+# -- Powers, items and tasks --
+@command("/usepower", 1, "Usage: /usepower @username")
+async def dm_usepower(update, context, user_id, args, reply):
+    result = use_power(user_id, args[0])
+    await reply(result)
+    if not result.startswith("❌"):
+        await phases.power_used(context, index.get_chat_id_by_user(user_id), user_id)
+
+
+@command("/useitem", 1, "Usage: /useitem item_name")
+async def dm_useitem(update, context, user_id, args, reply):
+    await reply(use_item(user_id, args[0]))
+
+
+@command("/mytasks")
+async def dm_mytasks(update, context, user_id, args, reply):
+    task = db.get_current_task(user_id)
+    if task:
+        desc = task.get("desc") or task.get("description") or str(task)
+        await reply(f"🧾 Your task: {desc}")
+    else:
+        await reply("You have no active task.")
+
+
+@command("/complete_task", 1, "Usage: /complete_task CODE")
+async def dm_complete_task(update, context, user_id, args, reply):
+    result = db.complete_task(user_id, args[0])
+    win.touch(index.get_chat_id_by_user(user_id), user_id)
+    await reply(result)
+
+
+@command("/abandon_task")
+async def dm_abandon_task(update, context, user_id, args, reply):
+    await reply(db.abandon_current_task(user_id))
+
+
+# -- Alliances --
+@command("/ally", 1, "Usage: /ally @username")
+async def dm_ally(update, context, user_id, args, reply):
+    target_username = args[0].replace("@", "")
+    target_id = index.get_user_id_by_name(target_username, index.get_chat_id_by_user(user_id))
+    if not target_id:
+        await reply("User not found.")
+        return
+    await outbox.submit(
+        context.bot, "send_message", outbox.NOTICE,
+        chat_id=target_id,
+        text=f"{update.effective_user.username} has proposed a secret alliance! Reply with /accept @{update.effective_user.username} to accept.",
+    )
+    await reply("Alliance request sent privately.")
+
+
+@command("/accept", 1, "Usage: /accept @username")
+async def dm_accept(update, context, user_id, args, reply):
+    target_username = args[0].replace("@", "")
+    target_id = index.get_user_id_by_name(target_username, index.get_chat_id_by_user(user_id))
+    if not target_id:
+        await reply("User not found.")
+        return
+    db.add_alliance(update.effective_chat.id, update.effective_user.id, target_id)
+    await reply("Alliance formed.")
+    try:
+        await outbox.submit(
+            context.bot, "send_message", outbox.NOTICE,
+            chat_id=target_id,
+            text=f"{update.effective_user.username} accepted your alliance. You are now linked.",
+        )
+    except Exception:
+        pass
+
+
+@command("/alliance", 1, "Usage: /alliance <your message>", rest=True)
+async def dm_alliance(update, context, user_id, args, reply):
+    db.send_alliance_group_message(update.effective_chat.id, user_id, args[0], context)
+    await reply("📨 Message sent to your alliance.")
+
+
+@command("/myallies")
+async def dm_myallies(update, context, user_id, args, reply):
+    allies = db.get_allies(update.effective_chat.id, update.effective_user.id)
+    if not allies:
+        await reply("You have no allies yet.")
+        return
+    names = [index.get_username(uid) for uid in allies]
+    await reply("Your Allies:\n" + "\n".join(f"- {name}" for name in names))
+
+
+# -- Trades --
+@command("/offer", 2, "Usage: /offer @username item_name")
+async def dm_offer(update, context, user_id, args, reply):
+    target_username = args[0].replace("@", "")
+    item_name = args[1]
+    target_id = index.get_user_id_by_name(target_username, index.get_chat_id_by_user(user_id))
+
+    if not target_id:
+        await reply("Target not found.")
+    elif item_name not in db.get_inventory(user_id):
+        await reply("You don't have that item.")
+    elif db.offer_item(update.effective_chat.id, user_id, target_id, item_name):
+        await reply("Offer sent.")
+        await outbox.submit(
+            context.bot, "send_message", outbox.NOTICE,
+            chat_id=target_id,
+            text=f"{update.effective_user.username} offered you '{item_name}'. Use /accept_trade @{update.effective_user.username} to accept."
+        )
+    else:
+        await reply("You already have a pending offer with this user.")
+
+
+@command("/accept_trade", 1, "Usage: /accept_trade @username")
+async def dm_accept_trade(update, context, user_id, args, reply):
+    from_username = args[0].replace("@", "")
+    from_id = index.get_user_id_by_name(from_username, index.get_chat_id_by_user(user_id))
+    if not from_id:
+        await reply("Offer not found.")
+        return
+
+    item = db.accept_offer(update.effective_chat.id, from_id, user_id)
+    if not item:
+        await reply("No valid offer found.")
+        return
+    win.touch(index.get_chat_id_by_user(user_id), user_id, from_id)
+    await reply(f"You received '{item}' from @{from_username}.")
+    await outbox.submit(
+        context.bot, "send_message", outbox.NOTICE,
+        chat_id=from_id,
+        text=f"{update.effective_user.username} accepted your trade. '{item}' transferred."
+    )
+
+
+@command("/myitems")
+async def dm_myitems(update, context, user_id, args, reply):
+    inv = db.get_inventory(user_id)
+    if not inv:
+        await reply("🎒 Your inventory is empty.")
+        return
+
+    buttons = [
+        [InlineKeyboardButton(f"Use: {item} ({qty})", callback_data=callbackdata.encode("useitem", item))]
+        for item, qty in inv.items()
+    ]
+    await outbox.submit(
+        context.bot, "send_message", outbox.NOTICE,
+        chat_id=user_id,
+        text="🧰 *Your Items:*",
+        parse_mode="Markdown",
+        reply_markup=InlineKeyboardMarkup(buttons)
+    )
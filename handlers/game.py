@@ -2,10 +2,11 @@
 
 from telegram import Update
 from telegram.ext import ContextTypes
-from engine import phases
+from engine import phases, metrics, phrases, tasks, outbox
 from storage import database as db
 
 # PHASE HANDLER: cycles day → night → dawn → day...
+@metrics.instrumented("command")
 async def phase(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
@@ -54,13 +55,25 @@ async def phase(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("🔄 Starting Day Phase...", parse_mode="Markdown")
 
 
-# GROUP MESSAGE LOGGER: for phrase-based task tracking
+# GROUP MESSAGE MATCHER: completes phrase tasks as they are said
+@metrics.instrumented("group_message")
 async def handle_group_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message:
+    if not update.message or not update.message.text:
         return
 
+    chat_id = update.effective_chat.id
     user = update.effective_user
-    text = update.message.text
+    game = db.games.get(chat_id)
+    # Nothing is kept for chats without a game or for onlookers
+    if game is None or user is None or user.id not in game.get("players", {}):
+        return
+
+    # The store keeps its own log of what players say (db.record_message)
+    db.record_message(user.id, update.message.text)
 
-    # ✅ Log for phrase-completion task triggers
-    db.record_message(user.id, text)
+    for code, phrase in phrases.scan(chat_id, user.id, update.message.text):
+        result = tasks.submit_task(user.id, code)
+        failed = result.startswith("❌")
+        phrases.unwatch(chat_id, user.id, phrase, everything=failed)  # one task done, or none left
+        if not failed:
+            outbox.post(context.bot, "send_message", outbox.NOTICE, chat_id=user.id, text=result)
@@ -0,0 +1,129 @@
+# index.py — O(1) reverse lookups kept alongside storage.database
+#
+# The mutators below wrap their storage.database counterparts and keep the
+# indexes in step; call them instead of the db.* versions. Lookups fall back
+# to the db scan on a miss (e.g. players loaded before the index existed).
+
+from storage import database as db
+from storage import persist
+
+_chat_by_user = {}      # user_id -> chat_id
+_user_by_name = {}      # (chat_id, lowercased username) -> user_id
+_name_by_user = {}      # user_id -> display name
+_users_by_chat = {}     # chat_id -> {user_id}, so a whole game can be dropped at once
+_unknown_names = set()  # lowercased names the db scan did not find; cleared as names are indexed
+MAX_UNKNOWN_NAMES = 10000
+
+
+def remember(chat_id, user_id, username=None):
+    previous = _chat_by_user.get(user_id)
+    old = _name_by_user.get(user_id)
+    # The stale name entry sits under the chat the user was indexed in before
+    if old is not None and previous is not None and (username or previous != chat_id):
+        if _user_by_name.get((previous, old.lower())) == user_id:
+            del _user_by_name[(previous, old.lower())]
+    if previous is not None and previous != chat_id:
+        users = _users_by_chat.get(previous)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del _users_by_chat[previous]
+
+    _chat_by_user[user_id] = chat_id
+    _users_by_chat.setdefault(chat_id, set()).add(user_id)
+    name = username or old
+    if name:
+        _name_by_user[user_id] = name
+        _user_by_name[(chat_id, name.lower())] = user_id
+        _unknown_names.discard(name.lower())
+
+
+def forget(chat_id, user_id):
+    if _chat_by_user.get(user_id) == chat_id:
+        del _chat_by_user[user_id]
+    name = _name_by_user.pop(user_id, None)
+    if name is not None:
+        _user_by_name.pop((chat_id, name.lower()), None)
+    users = _users_by_chat.get(chat_id)
+    if users is not None:
+        users.discard(user_id)
+        if not users:
+            del _users_by_chat[chat_id]
+
+
+# -- Mutators --
+def add_player(chat_id, user_id, full_name):
+    success = db.add_player(chat_id, user_id, full_name)
+    if success:
+        remember(chat_id, user_id)
+        persist.mark_dirty(chat_id)
+    return success
+
+
+def set_username(chat_id, user_id, username):
+    db.set_username(chat_id, user_id, username)
+    remember(chat_id, user_id, username)
+    persist.mark_dirty(chat_id)
+
+
+def remove_player(chat_id, user_id):
+    removed = db.remove_player(chat_id, user_id)
+    if removed:
+        forget(chat_id, user_id)
+        persist.mark_dirty(chat_id)
+    return removed
+
+
+def swap_roles(chat_id, user_a, user_b):
+    # Roles are not indexed; wrapped so the swap is persisted like the other writes
+    result = db.swap_roles(chat_id, user_a, user_b)
+    persist.mark_dirty(chat_id)
+    return result
+
+
+def cancel_game(chat_id):
+    db.cancel_game(chat_id)
+    persist.mark_deleted(chat_id)
+    for user_id in list(_users_by_chat.get(chat_id, ())):
+        forget(chat_id, user_id)
+
+
+# -- Lookups --
+def get_chat_id_by_user(user_id):
+    chat_id = _chat_by_user.get(user_id)
+    if chat_id is None:
+        chat_id = db.get_chat_id_by_user(user_id)
+        if chat_id is not None:
+            remember(chat_id, user_id)
+    return chat_id
+
+
+def get_user_id_by_name(username, chat_id=None):
+    username = username.replace("@", "")
+    key = username.lower()
+    if chat_id is not None:
+        user_id = _user_by_name.get((chat_id, key))
+        if user_id is not None:
+            return user_id
+    if key in _unknown_names:
+        return None
+
+    # Miss: scan once, then index what the scan found (or that it found nothing)
+    user_id = db.get_user_id_by_name(username)
+    if user_id is None:
+        if len(_unknown_names) >= MAX_UNKNOWN_NAMES:
+            _unknown_names.clear()
+        _unknown_names.add(key)
+        return None
+    found_chat = get_chat_id_by_user(user_id)
+    if found_chat is not None:
+        remember(found_chat, user_id, username if _name_by_user.get(user_id) is None else None)
+        _user_by_name[(found_chat, key)] = user_id
+    return user_id
+
+
+def get_username(user_id):
+    name = _name_by_user.get(user_id)
+    if name is None:
+        name = db.get_username(user_id)
+    return name
@@ -0,0 +1,284 @@
+# persist.py — optional SQLite (WAL) write-behind for db.games
+#
+# Disabled unless AETHER_DB_PATH is set. Hot paths only call mark_dirty(chat_id),
+# which is a set insert; dirty games are serialised and written in a single
+# transaction at phase boundaries (checkpoint) and on a short timer.
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from storage import database as db
+
+DB_PATH = os.environ.get("AETHER_DB_PATH")
+FLUSH_INTERVAL = 5  # seconds
+
+stats = {"flushes": 0, "rows_written": 0, "flush_seconds": 0.0}
+
+_conn = None
+_dirty = set()
+_deleted = set()
+_timer = None
+_flusher = None   # the one flush_async write in flight
+_write_lock = threading.Lock()
+
+
+def enabled():
+    return _conn is not None
+
+
+def open_store(path=DB_PATH):
+    global _conn
+    if not path or _conn is not None:
+        return _conn
+    _conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    _conn.execute("PRAGMA journal_mode=WAL")
+    _conn.execute("PRAGMA synchronous=NORMAL")
+    _conn.execute(
+        "CREATE TABLE IF NOT EXISTS games ("
+        " chat_id INTEGER PRIMARY KEY,"
+        " state TEXT NOT NULL,"
+        " updated REAL NOT NULL)"
+    )
+    _conn.execute("CREATE TABLE IF NOT EXISTS media (url TEXT PRIMARY KEY, file_id TEXT NOT NULL)")
+    return _conn
+
+
+def close_store():
+    global _conn, _timer
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+    if _conn is not None:
+        flush()
+        _conn.close()
+        _conn = None
+
+
+# -- Hot path --
+def mark_dirty(chat_id):
+    if _conn is None:
+        return
+    _dirty.add(chat_id)
+    _deleted.discard(chat_id)
+    _ensure_timer()
+
+
+def mark_deleted(chat_id):
+    if _conn is None:
+        return
+    _deleted.add(chat_id)
+    _dirty.discard(chat_id)
+    _ensure_timer()
+
+
+# -- Encoding --
+# JSON only has str keys, lists and dicts, so everything else in a game is tagged
+# and comes back with the type it was saved with:
+#   {"__map__": [[key, value], ...]}   a dict with any non-str key (player ids, votes...)
+#   {"__set__": [...]}, {"__tuple__": [...]}
+# Rows are wrapped as {"__game__": ...}; older rows without it are plain JSON.
+def _pack(value):
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _pack(item) for key, item in value.items()}
+        return {"__map__": [[_pack(key), _pack(item)] for key, item in value.items()]}
+    if isinstance(value, list):
+        return [_pack(item) for item in value]
+    if isinstance(value, tuple):
+        return {"__tuple__": [_pack(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": [_pack(item) for item in value]}
+    if hasattr(value, "to_dict"):
+        return _pack(value.to_dict())
+    return value
+
+
+def _unpack(obj):
+    if len(obj) == 1:
+        if "__map__" in obj:
+            return {key: item for key, item in obj["__map__"]}
+        if "__set__" in obj:
+            return set(obj["__set__"])
+        if "__tuple__" in obj:
+            return tuple(obj["__tuple__"])
+    return obj
+
+
+def _encode(game):
+    return json.dumps({"__game__": _pack(game)}, default=str)
+
+
+# -- Write-behind --
+def _collect():
+    now = time.time()
+    rows = []
+    for chat_id in _dirty:
+        game = db.games.get(chat_id)
+        if game is not None:
+            rows.append((chat_id, _encode(game), now))
+    deleted = [(chat_id, now) for chat_id in _deleted]
+    _dirty.clear()
+    _deleted.clear()
+    return rows, deleted
+
+
+def _write(rows, deleted):
+    started = time.perf_counter()
+    with _write_lock:
+        try:
+            _conn.execute("BEGIN")
+            # A snapshot never overwrites a newer one, whichever write commits first
+            _conn.executemany(
+                "INSERT INTO games (chat_id, state, updated) VALUES (?, ?, ?)"
+                " ON CONFLICT(chat_id) DO UPDATE SET state = excluded.state, updated = excluded.updated"
+                " WHERE excluded.updated >= games.updated", rows)
+            _conn.executemany("DELETE FROM games WHERE chat_id = ? AND updated <= ?", deleted)
+            _conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            _conn.execute("ROLLBACK")
+            print(f"[WARN] Game state flush failed: {e}")
+            return False
+    stats["flushes"] += 1
+    stats["rows_written"] += len(rows) + len(deleted)
+    stats["flush_seconds"] += time.perf_counter() - started
+    return True
+
+
+# Blocking flush, for shutdown and scripts
+def flush():
+    if _conn is None or not (_dirty or _deleted):
+        return 0
+    rows, deleted = _collect()
+    if not _write(rows, deleted):
+        _requeue(rows, deleted)
+        return 0
+    return len(rows) + len(deleted)
+
+
+# Snapshot on the event loop, write on a worker thread so handlers never wait on disk.
+# One flusher at a time: it snapshots only once the previous write has landed and
+# goes round again while games were marked dirty meanwhile, so writes stay in order.
+async def flush_async():
+    global _flusher
+    if _conn is None or not (_dirty or _deleted):
+        return 0
+    if _flusher is None or _flusher.done():
+        _flusher = asyncio.get_running_loop().create_task(_flush_loop())
+    return await asyncio.shield(_flusher)
+
+
+async def _flush_loop():
+    written = 0
+    while _conn is not None and (_dirty or _deleted):
+        rows, deleted = _collect()
+        if not await asyncio.to_thread(_write, rows, deleted):
+            _requeue(rows, deleted)
+            break
+        written += len(rows) + len(deleted)
+    return written
+
+
+def _requeue(rows, deleted):
+    _dirty.update(chat_id for chat_id, _, _ in rows if chat_id not in _deleted)
+    _deleted.update(chat_id for chat_id, _ in deleted if chat_id not in _dirty)
+
+
+# Phase boundary: mark the game and write everything pending without waiting
+def checkpoint(chat_id):
+    if _conn is None:
+        return
+    mark_dirty(chat_id)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush()
+        return
+    if _flusher is None or _flusher.done():
+        loop.create_task(flush_async())
+    # else: the running flusher picks this game up on its next pass
+
+
+def _ensure_timer():
+    global _timer
+    if _timer is not None:
+        return
+    try:
+        _timer = asyncio.get_running_loop().call_later(FLUSH_INTERVAL, _on_timer)
+    except RuntimeError:
+        pass  # no loop (scripts, benchmarks): callers flush explicitly
+
+
+def _on_timer():
+    global _timer
+    _timer = None
+    asyncio.get_running_loop().create_task(flush_async())
+
+
+# -- Restore --
+def _decode(state):
+    data = json.loads(state, object_hook=_unpack)
+    if "__game__" in data:
+        return data["__game__"]
+    # Older rows: player ids, vote maps and queued night actions had their int keys stringified
+    for key in ("players", "votes", "night_actions"):
+        if isinstance(data.get(key), dict):
+            data[key] = {int(k) if k.lstrip("-").isdigit() else k: v for k, v in data[key].items()}
+    return data
+
+
+def load_games():
+    if _conn is None:
+        return {}
+    with _write_lock:
+        rows = _conn.execute("SELECT chat_id, state FROM games").fetchall()
+    return {chat_id: _decode(state) for chat_id, state in rows}
+
+
+# -- Media file_ids (engine/media.py) --
+def load_media():
+    if _conn is None:
+        return {}
+    with _write_lock:
+        return dict(_conn.execute("SELECT url, file_id FROM media").fetchall())
+
+
+def save_media(url, file_id):
+    if _conn is None:
+        return
+    with _write_lock:
+        _conn.execute("INSERT OR REPLACE INTO media (url, file_id) VALUES (?, ?)", (url, file_id))
+
+
+def delete_media(url):
+    if _conn is None:
+        return
+    with _write_lock:
+        _conn.execute("DELETE FROM media WHERE url = ?", (url,))
+
+
+# (user_id, chat_id) for every seated player in a store file, read without
+# taking it over as the live store; the sharding front rebuilds routes from these
+def read_seats(path):
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT chat_id, state FROM games").fetchall()
+    except sqlite3.Error as e:
+        print(f"[WARN] Could not read seats from {path}: {e}")
+        rows = []
+    finally:
+        conn.close()
+    return [(user_id, chat_id) for chat_id, state in rows for user_id in _decode(state).get("players", {})]
+
+
+# Call once at startup, before handlers run
+def restore():
+    if open_store() is None:
+        return 0
+    games = load_games()
+    db.games.update(games)
+    return len(games)
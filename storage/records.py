@@ -0,0 +1,220 @@
+# records.py — compact slotted game/player records with interned roles and factions
+#
+# PlayerState and GameState are drop-in records for the per-player and per-game
+# dicts behind storage.database. They keep dict-style access (record["role"],
+# .get, .pop) so existing callers work unchanged, but known fields live in
+# __slots__ and roles/factions are stored as small ints. Unknown keys spill into
+# `extra`, which is only allocated when first needed. The store that would build
+# them is not part of this tree; here the engine uses the interned ids (catalog,
+# win, roles) and benchmarks/bench_memory.py measures the records.
+#
+# Role and faction names must be in the tables below: interning an unknown name
+# raises ValueError instead of quietly reading back as None.
+
+from enum import IntEnum
+
+
+class Role(IntEnum):
+    NONE = 0
+    SHADEBLADE = 1
+    ORACLE = 2
+    SUCCUBUS = 3
+    TINKERER = 4
+    WHISPERSMITH = 5
+    BLIGHT_WHISPERER = 6
+    LUMEN_PRIEST = 7
+    LIGHT_HERALD = 8
+    ASCENDED = 9
+    SABOTEUR = 10
+    COURTESAN = 11
+    ARCHIVIST = 12
+    PUPPETMASTER = 13
+    TRICKSTER = 14
+    GOAT = 15
+
+
+class Faction(IntEnum):
+    NONE = 0
+    LUMINAE = 1
+    VEILBORN = 2
+    NEXUS = 3
+    ROGUE = 4
+    NEUTRAL = 5
+    GOAT = 6
+
+
+ROLE_NAMES = {
+    Role.NONE: None,
+    Role.SHADEBLADE: "Shadeblade",
+    Role.ORACLE: "Oracle",
+    Role.SUCCUBUS: "Succubus",
+    Role.TINKERER: "Tinkerer",
+    Role.WHISPERSMITH: "Whispersmith",
+    Role.BLIGHT_WHISPERER: "Blight Whisperer",
+    Role.LUMEN_PRIEST: "Lumen Priest",
+    Role.LIGHT_HERALD: "Light Herald",
+    Role.ASCENDED: "Ascended",
+    Role.SABOTEUR: "Saboteur",
+    Role.COURTESAN: "Courtesan",
+    Role.ARCHIVIST: "Archivist",
+    Role.PUPPETMASTER: "Puppetmaster",
+    Role.TRICKSTER: "Trickster",
+    Role.GOAT: "Goat",
+}
+ROLE_IDS = {name: role for role, name in ROLE_NAMES.items() if name}
+
+FACTION_NAMES = {faction: faction.name.capitalize() if faction else None for faction in Faction}
+FACTION_IDS = {name: faction for faction, name in FACTION_NAMES.items() if name}
+
+
+def intern_role(name):
+    if not name:
+        return Role.NONE
+    role = ROLE_IDS.get(name)
+    if role is None:
+        raise ValueError(f"unknown role '{name}'")
+    return role
+
+
+def intern_faction(name):
+    if not name:
+        return Faction.NONE
+    faction = FACTION_IDS.get(name)
+    if faction is None:
+        raise ValueError(f"unknown faction '{name}'")
+    return faction
+
+
+class _Record:
+    __slots__ = ("extra",)
+    _FIELDS = frozenset()
+    _DEFAULTS = {}
+
+    def _load(self, key):
+        return getattr(self, key)
+
+    def _store(self, key, value):
+        setattr(self, key, value)
+
+    def __getitem__(self, key):
+        if key in self._FIELDS:
+            return self._load(key)
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._FIELDS:
+            self._store(key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._FIELDS or (self.extra is not None and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self._FIELDS:
+            value = self._load(key)
+            self._store(key, self._DEFAULTS[key]() if callable(self._DEFAULTS[key]) else self._DEFAULTS[key])
+            return value
+        if self.extra is not None and key in self.extra:
+            return self.extra.pop(key)
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def keys(self):
+        return list(self._FIELDS) + (list(self.extra) if self.extra else [])
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class PlayerState(_Record):
+    __slots__ = ("name", "username", "role_id", "faction_id", "alive")
+    _FIELDS = frozenset(("name", "username", "role", "faction", "alive"))
+    _DEFAULTS = {"name": None, "username": None, "role": None, "faction": None, "alive": True}
+
+    def __init__(self, name=None, username=None, role=None, faction=None, alive=True):
+        self.extra = None
+        self.name = name
+        self.username = username
+        self.role_id = intern_role(role)
+        self.faction_id = intern_faction(faction)
+        self.alive = alive
+
+    @property
+    def role(self):
+        return ROLE_NAMES[self.role_id]
+
+    @property
+    def faction(self):
+        return FACTION_NAMES[self.faction_id]
+
+    def _load(self, key):
+        if key == "role":
+            return ROLE_NAMES[self.role_id]
+        if key == "faction":
+            return FACTION_NAMES[self.faction_id]
+        return getattr(self, key)
+
+    def _store(self, key, value):
+        if key == "role":
+            self.role_id = intern_role(value)
+        elif key == "faction":
+            self.faction_id = intern_faction(value)
+        else:
+            setattr(self, key, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        player = cls()
+        for key, value in data.items():
+            player[key] = value
+        return player
+
+
+class GameState(_Record):
+    __slots__ = ("players", "phase", "round", "started", "votes", "deaths")
+    _FIELDS = frozenset(__slots__)
+    _DEFAULTS = {"players": dict, "phase": None, "round": 0, "started": False, "votes": dict, "deaths": list}
+
+    def __init__(self):
+        self.extra = None
+        self.players = {}
+        self.phase = None
+        self.round = 0
+        self.started = False
+        self.votes = {}
+        self.deaths = []
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["players"] = {pid: player.to_dict() for pid, player in self.players.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        game = cls()
+        for key, value in data.items():
+            if key == "players":
+                game.players = {pid: PlayerState.from_dict(p) for pid, p in value.items()}
+            else:
+                game[key] = value
+        return game
@@ -0,0 +1,22 @@
+# conftest.py — make the engine importable without the bot's storage backend
+#
+# storage.database is the deployment's store and is not checked in. Tests that
+# need its data replace it per test with monkeypatch; importing the engine only
+# needs the module to exist with an empty games table.
+
+import importlib.util
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+if importlib.util.find_spec("storage.database") is None:
+    import storage
+
+    database = types.ModuleType("storage.database")
+    database.games = {}
+    sys.modules["storage.database"] = database
+    storage.database = database
@@ -0,0 +1,61 @@
+# test_persist.py — a game written to the SQLite store reads back unchanged
+#
+# Covers the shapes JSON alone loses: int-keyed dicts at any depth, sets,
+# tuples (also as keys), plus rows saved before the tagged encoding.
+
+import json
+import pytest
+
+from storage import database as db
+from storage import persist
+
+CHAT = -100
+
+
+def sample_game():
+    return {
+        "phase": "night",
+        "round": 3,
+        "players": {
+            101: {"name": "Ada", "role": "Oracle", "alive": True, "marks": {7, 9}},
+            -5: {"name": "Bo", "role": "Goat", "alive": False, "marks": set()},
+        },
+        "votes": {101: -5},
+        "night_actions": {101: [4, 2, -5, "bo"]},
+        "deadlines": {"phase": 1712345678.5},
+        "whispers": {(101, -5): True},
+        "history": [{1: "joined"}, ("kill", -5)],
+        "echo": {"101": "save_the_core"},   # str keys that look like ints stay str
+        "empty": {},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    persist.open_store(str(tmp_path / "games.db"))
+    yield
+    persist.close_store()
+    db.games.pop(CHAT, None)
+
+
+def test_round_trip_through_store(store):
+    game = sample_game()
+    db.games[CHAT] = game
+    persist.mark_dirty(CHAT)
+    assert persist.flush() == 1
+    assert persist.load_games() == {CHAT: sample_game()}
+
+
+def test_round_trip_types():
+    restored = persist._decode(persist._encode(sample_game()))
+    assert restored == sample_game()
+    assert isinstance(restored["players"][101]["marks"], set)
+    assert isinstance(restored["history"][1], tuple)
+    assert list(restored["echo"]) == ["101"]
+
+
+def test_reads_rows_written_before_tagging():
+    legacy = json.dumps({"phase": "day", "players": {"101": {"name": "Ada"}}, "votes": {"101": "-5"}})
+    restored = persist._decode(legacy)
+    assert restored["players"] == {101: {"name": "Ada"}}
+    assert restored["votes"] == {101: "-5"}
@@ -0,0 +1,191 @@
+# test_win.py — incremental WinState against the original full-scan check_for_winner
+#
+# Plays random games on an in-memory table: kills, relic gains, thread use,
+# nexus control, role swaps and Final Echo votes, reporting each change through
+# the same win.* hooks the engine uses. After every step the incremental
+# verdict must equal the one the original implementation computes from scratch.
+
+import random
+import pytest
+
+from engine import catalog, win
+from storage import index
+
+CHAT = -100
+TRIALS = 3000
+ECHO_CHOICES = (None, "destroy_the_core", "save_the_core", "escape_the_core")
+
+
+class Table:
+    def __init__(self, rng, n_players):
+        roles = list(catalog.POOL)
+        rng.shuffle(roles)
+        self.players = {}
+        for seat in range(n_players):
+            pid = 1000 + seat
+            role = roles.pop() if roles else "Goat"
+            self.players[pid] = {"role": role, "faction": catalog.BY_NAME[role].faction,
+                                 "alive": True, "relics": 0, "thread": False, "nexus": False}
+        self.echo = None
+        self.betrayer = None
+        self.escapees = []
+        self.nexus_winner = None
+
+    # storage.database surface used by both implementations
+    def get_alive_players(self, chat_id):
+        return [pid for pid, p in self.players.items() if p["alive"]]
+
+    def get_player_faction(self, pid):
+        return self.players[pid]["faction"]
+
+    def get_user_role(self, pid):
+        return self.players[pid]["role"]
+
+    def get_relic_count(self, pid):
+        return self.players[pid]["relics"]
+
+    def used_thread(self, pid):
+        return self.players[pid]["thread"]
+
+    def check_nexus_control(self, pid):
+        return self.players[pid]["nexus"]
+
+    def set_nexus_winner(self, pid):
+        self.nexus_winner = pid
+
+    def get_username(self, pid):
+        return f"user{pid}"
+
+    def is_final_echo_active(self, chat_id):
+        return self.echo is not None
+
+    def get_dominant_echo_vote(self, chat_id):
+        return self.echo
+
+    def get_top_betrayer(self, chat_id):
+        return self.betrayer
+
+    def get_escapees(self, chat_id):
+        return self.escapees
+
+
+# The pre-WinState implementation, kept verbatim as the oracle
+def baseline_check_for_winner(db, chat_id):
+    players = db.get_alive_players(chat_id)
+
+    if not players:
+        return "💀 Everyone perished. The void claims Aether."
+
+    factions = [db.get_player_faction(pid) for pid in players]
+    roles = {pid: db.get_user_role(pid) for pid in players}
+    unique_factions = set(factions)
+
+    for pid in players:
+        if roles[pid] == "Goat" and len(players) <= 3:
+            return f"🐐 @{db.get_username(pid)} (Goat) wins by surviving until the Final 3!"
+
+    for pid in players:
+        if roles[pid] == "Archivist" and db.get_relic_count(pid) >= 3:
+            return f"📚 @{db.get_username(pid)} (Archivist) wins by collecting 3 relics!"
+
+    for pid in players:
+        if roles[pid] == "Puppetmaster" and db.used_thread(pid):
+            return f"🧵 @{db.get_username(pid)} (Puppetmaster) wins via total mind control!"
+
+    for pid in players:
+        if roles[pid] == "Ascended" and db.check_nexus_control(pid):
+            db.set_nexus_winner(pid)
+            return f"⚙️ Nexus Manipulation! @{db.get_username(pid)} (Ascended) triggers Core Hijack Victory!"
+
+    if len(unique_factions) == 1:
+        faction = unique_factions.pop()
+        return f"🏆 {faction} claims the world of Aether. All others perished!"
+
+    if db.is_final_echo_active(chat_id):
+        dominant_echo = db.get_dominant_echo_vote(chat_id)
+
+        if dominant_echo == "destroy_the_core":
+            top_betrayer = db.get_top_betrayer(chat_id)
+            if top_betrayer:
+                return f"💥 Chaos wins! @{db.get_username(top_betrayer)} becomes the *True Echo of Destruction*."
+            return "💥 Chaos reigns. The world is destroyed. No victors remain."
+
+        elif dominant_echo == "save_the_core":
+            return "🕊️ Hope prevails. The Core survives and the Luminae ascend!"
+
+        elif dominant_echo == "escape_the_core":
+            escapers = db.get_escapees(chat_id)
+            if escapers:
+                names = ", ".join(f"@{db.get_username(uid)}" for uid in escapers)
+                return f"🚀 Escapees: {names} survived the collapse!"
+            return "🚀 A few managed to escape. Aether's future is... unknown."
+
+    return None
+
+
+# One random change to the table, reported the way the engine reports it
+def step(rng, table):
+    alive = table.get_alive_players(CHAT)
+    if not alive:
+        return
+    pid = rng.choice(alive)
+    player = table.players[pid]
+    event = rng.choice(("kill", "relic", "thread", "nexus", "swap", "echo"))
+
+    if event == "kill":
+        player["alive"] = False
+        win.on_kill(CHAT, pid)
+    elif event == "relic":
+        player["relics"] += 1
+        win.touch(CHAT, pid)
+    elif event == "thread":
+        player["thread"] = True
+        win.touch(CHAT, pid)
+    elif event == "nexus":
+        player["nexus"] = not player["nexus"]   # uncached check, read live
+    elif event == "swap":
+        other = table.players[rng.choice(alive)]
+        for key in ("role", "faction"):
+            player[key], other[key] = other[key], player[key]
+        win.rebuild(CHAT)
+    else:
+        table.echo = rng.choice(ECHO_CHOICES)
+        table.betrayer = rng.choice(alive + [None])
+        table.escapees = rng.sample(alive, rng.randint(0, len(alive)))
+
+
+@pytest.fixture
+def table_db(monkeypatch):
+    holder = {}
+    proxy = type("TableProxy", (), {"__getattr__": lambda self, name: getattr(holder["table"], name)})()
+    monkeypatch.setattr(win, "db", proxy)
+    monkeypatch.setattr(index, "db", proxy)
+    monkeypatch.setattr(index, "_name_by_user", {})
+    yield holder
+    win.forget(CHAT)
+
+
+def test_incremental_matches_full_scan(table_db):
+    rng = random.Random(2024)
+    for trial in range(TRIALS):
+        table = table_db["table"] = Table(rng, rng.randint(1, 18))
+        win.rebuild(CHAT)
+        for move in range(rng.randint(0, 25)):
+            expected = baseline_check_for_winner(table, CHAT)
+            assert win.check_for_winner(CHAT) == expected, f"trial {trial}, move {move}"
+            step(rng, table)
+        assert win.check_for_winner(CHAT) == baseline_check_for_winner(table, CHAT), f"trial {trial}, end"
+
+
+# Extra Goats appear past 15 players; after a touch the earliest-seated one must still win
+def test_goat_tie_goes_to_earliest_seat(table_db):
+    table = table_db["table"] = Table(random.Random(0), 17)
+    win.rebuild(CHAT)
+    goats = [pid for pid, p in table.players.items() if p["role"] == "Goat"]
+    for pid in table.players:
+        if pid not in goats and len(table.get_alive_players(CHAT)) > 3:
+            table.players[pid]["alive"] = False
+            win.on_kill(CHAT, pid)
+    table.players[goats[0]]["relics"] += 1
+    win.touch(CHAT, goats[0])
+    assert win.check_for_winner(CHAT) == baseline_check_for_winner(table, CHAT)